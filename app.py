@@ -1,5 +1,9 @@
 import streamlit as st
+import pandas as pd
 import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add main folder to Python path
@@ -8,14 +12,106 @@ sys.path.append(str(main_folder))
 
 # Import modules from main folder
 from main.config import Config
-from main.document_loader import validate_document, get_file_info
-from main.text_extractor import extract_text
-from main.metadata_generator import generate_basic_metadata, clean_text_for_analysis
-from main.language_detector import analyze_language
+from main.document_loader import validate_document, get_file_info, get_file_type
+from main.text_extractor import extract_document, file_sha256
+from main.metadata_generator import generate_basic_metadata
+from main.language_detector import analyze_language, warm_up_language_profiles
 from main.text_analyzer import analyze_text_structure
 from main.summary_generator import generate_document_insights
-from main.file_handler import handle_file_upload, display_file_info, validate_uploaded_file, cleanup_temp_files
-from main.utils import format_file_size, export_metadata_json, is_text_meaningful
+from main.near_duplicate_index import minhash_signature, find_near_duplicates, remember_document, reusable_insights, get_near_duplicate_index, diff_texts
+from main.file_handler import handle_file_upload, handle_batch_upload, display_file_info, validate_uploaded_file, cleanup_temp_files, start_temp_reaper, save_temporary_file, temp_dir_in_use
+from main.utils import format_file_size, export_metadata_json, export_metadata_jsonl, export_metadata_csv, is_text_meaningful
+from main.batch_processor import iter_batch_results
+# Imported the way summary_generator imports it, so warming it up loads the model that module uses
+from doc_type_classifier import get_doc_type_classifier
+
+@st.cache_resource(show_spinner=False)
+def load_resources():
+    """Load heavy per-process resources once instead of on every rerun"""
+    warm_up_language_profiles()
+    get_doc_type_classifier()
+    start_temp_reaper()
+
+@st.cache_resource(show_spinner=False)
+def get_insights_worker():
+    """Background pool for AI insights plus their futures by content hash, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=Config.APP_INSIGHTS_WORKERS), OrderedDict(), threading.Lock()
+
+# Stage results are cached across sessions by file content hash; underscore arguments are not hashed
+
+class _UncachedDocument(Exception):
+    """Carries a failed or OCR-degraded extraction out of the cached function so it is not kept"""
+    
+    def __init__(self, document):
+        super().__init__("document not cacheable")
+        self.document = document
+
+@st.cache_resource(max_entries=Config.APP_DOCUMENT_CACHE_MAX_ENTRIES, ttl=Config.APP_CACHE_TTL_SECONDS, show_spinner=False)
+def _cached_document(content_hash, file_type, _uploaded_file):
+    # One shared buffer per document; cache_data would unpickle a full copy on every rerun
+    document = extract_document(_uploaded_file, file_type)
+    if document.text.startswith("Error extracting") or document.ocr_failures:
+        raise _UncachedDocument(document)
+    return document
+
+def cached_document(content_hash, file_type, uploaded_file):
+    """Extracted document, shared across reruns and sessions unless extraction failed or was degraded"""
+    try:
+        return _cached_document(content_hash, file_type, uploaded_file)
+    except _UncachedDocument as e:
+        return e.document
+
+@st.cache_data(max_entries=Config.APP_CACHE_MAX_ENTRIES, ttl=Config.APP_CACHE_TTL_SECONDS, show_spinner=False)
+def cached_basic_metadata(content_hash, file_name, file_type, _uploaded_file, _document):
+    return generate_basic_metadata(_uploaded_file, _document.text, file_type, stats=_document.stats)
+
+@st.cache_data(max_entries=Config.APP_CACHE_MAX_ENTRIES, ttl=Config.APP_CACHE_TTL_SECONDS, show_spinner=False)
+def cached_language_analysis(content_hash, _text):
+    return analyze_language(_text)
+
+@st.cache_data(max_entries=Config.APP_CACHE_MAX_ENTRIES, ttl=Config.APP_CACHE_TTL_SECONDS, show_spinner=False)
+def cached_text_analysis(content_hash, _document):
+    return analyze_text_structure(_document.text, stats=_document.stats)
+
+def upload_content_hash(uploaded_file):
+    """Content hash of the current upload, computed once per upload rather than on every rerun"""
+    file_id, content_hash = st.session_state.get('upload_hash', (None, None))
+    if file_id != uploaded_file.file_id:
+        content_hash = file_sha256(uploaded_file)
+        st.session_state['upload_hash'] = (uploaded_file.file_id, content_hash)
+    return content_hash
+
+def _insights_job(text, file_name, reuse_insights):
+    """Background worker: near-duplicate lookup, then reused or freshly generated insights"""
+    # Earlier revisions of the same document can share their insights
+    signature = minhash_signature(text) if Config.NEAR_DUP_ENABLED else None
+    matches = find_near_duplicates(text, signature=signature)
+    insights = reusable_insights(matches) if reuse_insights else None
+    if not insights:
+        insights = generate_document_insights(text)
+        remember_document(text, file_name, insights, signature=signature)
+    return insights, matches
+
+def _job_failed(future):
+    """Whether a finished insights job raised or returned an LLM error summary, so it should be rerun"""
+    if future.exception() is not None:
+        return True
+    insights, _ = future.result()
+    return str(insights.get('summary', '')).startswith("Error")
+
+def submit_insights(content_hash, text, file_name, reuse_insights):
+    """Start (or join) the background insights job for a document"""
+    executor, futures, lock = get_insights_worker()
+    key = (content_hash, reuse_insights)
+    with lock:
+        future = futures.get(key)
+        if future is None or (future.done() and _job_failed(future)):
+            future = executor.submit(_insights_job, text, file_name, reuse_insights)
+            futures[key] = future
+        futures.move_to_end(key)
+        while len(futures) > Config.APP_CACHE_MAX_ENTRIES:
+            futures.popitem(last=False)
+    return future
 
 def main():
     """Main Streamlit application"""
@@ -27,6 +123,9 @@ def main():
         layout="wide"
     )
     
+    # Language profiles, classifier, LLM client and the temp directory reaper, once per process
+    load_resources()
+    
     # Header
     st.title("📄 Automatic Meta-Data Generation")
     st.markdown("Upload your document and get comprehensive metadata analysis instantly!")
@@ -42,8 +141,18 @@ def main():
         st.write("• Images (.jpg, .png, .tiff) - OCR")
         
         st.header("⚙️ Settings")
+        mode = st.radio("Mode", ["Single document", "Batch"], horizontal=True)
         st.write(f"Max file size: {Config.MAX_FILE_SIZE_MB} MB")
         st.write(f"Reading speed: {Config.DEFAULT_READING_SPEED_WPM} WPM")
+        reuse_insights = st.checkbox(
+            "Reuse AI insights of near-duplicate documents",
+            value=Config.NEAR_DUP_REUSE_INSIGHTS,
+            disabled=not Config.NEAR_DUP_ENABLED
+        )
+    
+    if mode == "Batch":
+        batch_mode()
+        return
     
     # Main content
     uploaded_file = handle_file_upload()
@@ -60,33 +169,135 @@ def main():
         st.success(f"✅ File uploaded successfully!")
         display_file_info(uploaded_file)
         
-        # Process button
+        # Process button; results stay on screen across reruns of this session
+        content_hash = upload_content_hash(uploaded_file)
         if st.button("🚀 Process Document", type="primary"):
-            with st.spinner("Processing document..."):
-                process_document(uploaded_file)
+            st.session_state['processed_hash'] = content_hash
+        
+        if st.session_state.get('processed_hash') == content_hash:
+            process_document(uploaded_file, reuse_insights, content_hash)
     
     else:
         st.info("👆 Please upload a document to get started")
         
 
-def process_document(uploaded_file):
-    """Process uploaded document and generate metadata"""
+def batch_mode():
+    """Upload many files and process them concurrently on a worker pool"""
+    uploaded_files = handle_batch_upload()
+    include_insights = st.checkbox("Generate AI insights", value=True)
+    
+    if uploaded_files:
+        if len(uploaded_files) > Config.BATCH_MAX_FILES:
+            st.warning(f"Only the first {Config.BATCH_MAX_FILES} files will be processed")
+            uploaded_files = uploaded_files[:Config.BATCH_MAX_FILES]
+        
+        valid_files = []
+        for uploaded_file in uploaded_files:
+            is_valid, message = validate_uploaded_file(uploaded_file)
+            if is_valid:
+                valid_files.append(uploaded_file)
+            else:
+                st.error(f"❌ {uploaded_file.name}: {message}")
+        
+        if valid_files and st.button(f"🚀 Process {len(valid_files)} Documents", type="primary"):
+            st.session_state['batch_results'] = process_batch(valid_files, include_insights)
+    else:
+        st.info("👆 Please upload documents to get started")
+    
+    if st.session_state.get('batch_results'):
+        render_batch_results(st.session_state['batch_results'])
+
+def process_batch(uploaded_files, include_insights=True):
+    """Process files on the batch pool, updating per-file progress as each one finishes"""
+    saved_paths = {}
+    
+    def saved_jobs():
+        # Workers read the uploads from this session's temp directory instead of receiving their bytes;
+        # each file is saved only when a worker is free to take it
+        for index, uploaded_file in enumerate(uploaded_files):
+            saved_paths[index] = save_temporary_file(uploaded_file)
+            yield saved_paths[index], uploaded_file.name, get_file_type(uploaded_file.name)
+    
+    statuses = pd.DataFrame({'file_name': [file.name for file in uploaded_files], 'status': "queued", 'seconds': None})
+    progress = st.progress(0.0, text=f"0 of {len(uploaded_files)} files processed")
+    status_table = st.empty()
+    status_table.dataframe(statuses, hide_index=True, use_container_width=True)
+    
+    results = [None] * len(uploaded_files)
+    with temp_dir_in_use():
+        for completed, (index, result) in enumerate(iter_batch_results(saved_jobs(), include_insights=include_insights), 1):
+            results[index] = result
+            # Finished copies are no longer needed; timed-out ones may still be open and go with the directory
+            path = saved_paths.pop(index, None)
+            if path and result['status'] != 'timed out':
+                Path(path).unlink(missing_ok=True)
+            statuses.loc[index, ['status', 'seconds']] = [result['status'], result['seconds']]
+            progress.progress(completed / len(uploaded_files), text=f"{completed} of {len(uploaded_files)} files processed")
+            status_table.dataframe(statuses, hide_index=True, use_container_width=True)
+    
+    cleanup_temp_files()
+    return results
+
+def render_batch_results(results):
+    """Sortable results table and combined downloads for a finished batch"""
+    st.subheader("📊 Batch Results")
+    columns = ['file_name', 'status', 'document_type', 'detected_language', 'words', 'readability', 'seconds', 'error']
+    table = pd.DataFrame(results).reindex(columns=columns)
+    
+    sort_column = st.selectbox("Sort by", columns, index=columns.index('file_name'))
+    descending = st.toggle("Descending")
+    st.dataframe(
+        table.sort_values(sort_column, ascending=not descending, na_position='last'),
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    succeeded = sum(result['status'] == 'done' for result in results)
+    st.caption(f"{succeeded} of {len(results)} files processed successfully")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.download_button(
+            label="📄 Download as JSONL",
+            data=export_metadata_jsonl(results),
+            file_name="batch_metadata.jsonl",
+            mime="application/jsonl"
+        )
+    
+    with col2:
+        st.download_button(
+            label="📊 Download as CSV",
+            data=export_metadata_csv(results),
+            file_name="batch_metadata.csv",
+            mime="text/csv"
+        )
+    
+    with col3:
+        if st.button("🗑️ Clear Results"):
+            st.session_state.pop('batch_results', None)
+            st.rerun()
+
+def process_document(uploaded_file, reuse_insights=False, content_hash=None):
+    """Process uploaded document and render metadata stage by stage"""
     
     try:
         # Get file info
         file_info = get_file_info(uploaded_file)
         file_type = file_info['type']
+        content_hash = content_hash or file_sha256(uploaded_file)
         
-        # Extract text
-        st.write("🔍 Extracting text...")
-        text = extract_text(uploaded_file, file_type)
+        # Extract text into one buffer shared by every stage below
+        with st.spinner("🔍 Extracting text..."):
+            document = cached_document(content_hash, file_type, uploaded_file)
+        text = document.text
         
         if not is_text_meaningful(text):
             st.error("❌ Could not extract meaningful text from the document")
             return
         
-        # Clean text
-        cleaned_text = clean_text_for_analysis(text)
+        # LLM work starts now and runs while the sections below render
+        insights_future = submit_insights(content_hash, text, uploaded_file.name, reuse_insights)
         
         # Generate metadata sections
         col1, col2 = st.columns(2)
@@ -95,7 +306,7 @@ def process_document(uploaded_file):
             st.subheader("📋 Basic Metadata")
             
             # Basic metadata
-            basic_metadata = generate_basic_metadata(uploaded_file, cleaned_text, file_type)
+            basic_metadata = cached_basic_metadata(content_hash, uploaded_file.name, file_type, uploaded_file, document)
             
             for key, value in basic_metadata.items():
                 st.metric(key.replace('_', ' ').title(), value)
@@ -104,7 +315,7 @@ def process_document(uploaded_file):
             st.subheader("🌐 Language Analysis")
             
             # Language detection
-            lang_analysis = analyze_language(cleaned_text)
+            lang_analysis = cached_language_analysis(content_hash, text)
             st.metric("Detected Language", lang_analysis['detected_language'])
             st.metric("Confidence", lang_analysis['confidence'])
             
@@ -113,7 +324,7 @@ def process_document(uploaded_file):
         
         # Text structure analysis
         st.subheader("📊 Text Structure Analysis")
-        text_analysis = analyze_text_structure(cleaned_text)
+        text_analysis = cached_text_analysis(content_hash, document)
         
         col3, col4, col5 = st.columns(3)
         
@@ -140,7 +351,18 @@ def process_document(uploaded_file):
         st.subheader("🤖 AI-Powered Insights")
         
         with st.spinner("Generating AI insights..."):
-            insights = generate_document_insights(cleaned_text)
+            insights, matches = insights_future.result()
+        
+        if matches:
+            best = matches[0]
+            st.info(f"🔁 Similar to previously analyzed **{best['name']}** (~{best['similarity']:.0%} shingle overlap)")
+            previous_text = get_near_duplicate_index().get_text(best['doc_id'])
+            if previous_text is not None:
+                with st.expander("Show differences from the previous document"):
+                    st.code("\n".join(diff_texts(previous_text, text)) or "No line differences", language="diff")
+        
+        if insights.get('reused_from'):
+            st.caption(f"Insights reused from {insights['reused_from']}")
         
         # Document type
         st.write(f"**Document Type:** {insights['document_type']}")
@@ -185,6 +407,7 @@ def process_document(uploaded_file):
         
         with col7:
             if st.button("🗑️ Clear Results"):
+                st.session_state.pop('processed_hash', None)
                 cleanup_temp_files()
                 st.rerun()
     
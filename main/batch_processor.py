@@ -0,0 +1,189 @@
+import io
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from config import Config
+from text_extractor import extract_document
+from metadata_engine import MetadataEngine
+from utils import is_text_meaningful
+
+# Same fields as the single-document export
+BATCH_FIELDS = (
+    'file_name',
+    'extracted_on',
+    'file_type',
+    'file_size',
+    'document_length',
+    'word_count',
+    'approx_reading_time',
+    'paragraphs',
+    'detected_language',
+    'language_confidence',
+    'document_type',
+    'summary',
+    'key_points',
+    'readability',
+    'avg_word_length',
+    'avg_sentence_length'
+)
+
+class _SavedUpload(io.BufferedReader):
+    """An upload saved to disk, reopened with the size attribute Streamlit uploads have"""
+    
+    def __init__(self, path):
+        super().__init__(io.FileIO(path, 'rb'))
+        self.size = os.path.getsize(path)
+
+def _init_batch_worker(workers):
+    """Pool initializer: keep the extractors' own pools and the LLM rate limit from multiplying by the batch workers"""
+    Config.EXTRACTION_MAX_WORKERS = Config.BATCH_NESTED_WORKERS
+    Config.OCR_MAX_WORKERS = Config.BATCH_NESTED_WORKERS
+    # Each worker builds its own rate limiter, so together they stay within the configured rate
+    Config.LLM_REQUESTS_PER_SECOND = Config.LLM_REQUESTS_PER_SECOND / workers
+    Config.LLM_BURST = max(1, Config.LLM_BURST // workers)
+
+def _failed_result(file_name, status, error, seconds=None):
+    return {'file_name': file_name, 'status': status, 'error': error, 'seconds': seconds}
+
+def process_batch_file(path, file_name, file_type, include_insights=True):
+    """Extract and analyze one saved upload (process pool worker)"""
+    started = time.perf_counter()
+    fields = BATCH_FIELDS if include_insights else tuple(
+        field for field in BATCH_FIELDS if field not in ('document_type', 'summary', 'key_points'))
+    
+    try:
+        with _SavedUpload(path) as file:
+            document = extract_document(file, file_type)
+            if document.text.startswith("Error extracting") or not is_text_meaningful(document.text):
+                return _failed_result(file_name, 'error', document.text[:200] or "No meaningful text",
+                                      round(time.perf_counter() - started, 2))
+            
+            # The saved copy has a temp name; report and index the name the user uploaded
+            engine = MetadataEngine(file, document, file_type, file_name=file_name)
+            metadata = engine.compute(fields)
+            stats = engine.get('_stats')
+    except Exception as e:
+        return _failed_result(file_name, 'error', str(e), round(time.perf_counter() - started, 2))
+    
+    return {
+        **metadata,
+        'status': 'done',
+        'error': None,
+        'words': stats.word_count,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+def _warm_up():
+    """No-op task that starts a worker and imports this module in it"""
+    return os.getpid()
+
+def _new_pool(max_workers):
+    """Batch pool with every worker already started
+    
+    Workers are spawned, since forking the multithreaded Streamlit server
+    could copy locks held by other threads. Starting them all up front keeps
+    start-up time out of the per-file deadlines, and on Python 3.11 the pool
+    does not notice the death of a worker it spawned on demand.
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(Config.BATCH_START_METHOD),
+        initializer=_init_batch_worker,
+        initargs=(max_workers,)
+    )
+    wait([pool.submit(_warm_up) for _ in range(max_workers)])
+    return pool
+
+def iter_batch_results(jobs, max_workers=None, timeout=None, include_insights=True):
+    """Process (path, file_name, file_type) jobs on a bounded process pool
+    
+    Yields (index, result) as each file finishes, in completion order. At most
+    max_workers files run at once, and jobs is only advanced when a worker is
+    free, so a generator can save each upload just before it is needed. A file
+    running longer than timeout seconds is reported as timed out and no longer
+    waited for. If every worker is held by a timed-out file, the rest of the
+    batch moves to a fresh pool.
+    
+    A crashed worker breaks the whole pool. The pool is then replaced; if one
+    file was running it is reported as crashed, otherwise the files in flight
+    are rerun one at a time so only the one that crashes again fails.
+    """
+    max_workers = max_workers or Config.BATCH_MAX_WORKERS
+    timeout = timeout or Config.BATCH_FILE_TIMEOUT_SECONDS
+    queue = enumerate(jobs)
+    exhausted = False
+    suspects = deque()
+    pools = [_new_pool(max_workers)]
+    running = {}
+    stuck = set()
+    
+    try:
+        while not exhausted or suspects or running:
+            stuck = {future for future in stuck if not future.done()}
+            if len(stuck) >= max_workers:
+                pools[-1].shutdown(wait=False, cancel_futures=True)
+                pools.append(_new_pool(max_workers))
+                stuck = set()
+            
+            # Only submit when a worker is free, so each deadline starts when its file does
+            broken = False
+            while len(running) + len(stuck) < max_workers and not any(solo for *_, solo in running.values()):
+                if suspects:
+                    if running:
+                        break
+                    job, solo = suspects.popleft(), True
+                else:
+                    job = None if exhausted else next(queue, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    solo = False
+                
+                index, (path, file_name, file_type) = job
+                try:
+                    future = pools[-1].submit(process_batch_file, path, file_name, file_type, include_insights)
+                except (BrokenProcessPool, OSError):
+                    # A pool broken while starting a worker can also fail with "handle is closed"
+                    suspects.appendleft(job)
+                    broken = True
+                    break
+                running[future] = (job, time.monotonic() + timeout, solo)
+            
+            wait(running, timeout=Config.BATCH_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            crashed = []
+            for future, (job, deadline, solo) in list(running.items()):
+                index, (_, file_name, _) = job
+                if future.done():
+                    del running[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        crashed.append(job)
+                        continue
+                    except Exception as e:
+                        result = _failed_result(file_name, 'error', str(e))
+                    yield index, result
+                elif now > deadline:
+                    del running[future]
+                    stuck.add(future)
+                    yield index, _failed_result(file_name, 'timed out', f"No result after {timeout} seconds", timeout)
+            
+            if crashed or broken:
+                # Files still running on the broken pool are lost with it
+                crashed.extend(job for job, _, _ in running.values())
+                running.clear()
+                pools[-1].shutdown(wait=False, cancel_futures=True)
+                pools.append(_new_pool(max_workers))
+                if len(crashed) == 1 and not stuck:
+                    index, (_, file_name, _) = crashed[0]
+                    yield index, _failed_result(file_name, 'error', "Worker process crashed while processing this file")
+                else:
+                    suspects.extend(sorted(crashed, key=lambda job: job[0]))
+                stuck = set()
+    finally:
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,132 @@
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from config import Config
+
+def _is_busy(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+def connect_sqlite(path):
+    """Open a SQLite database in WAL mode, waiting out other processes that are opening it too
+    
+    Switching a fresh database to WAL takes a lock that the busy timeout does
+    not always wait for, so the switch is retried while SQLite reports busy.
+    """
+    conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None,
+                           timeout=Config.CACHE_BUSY_TIMEOUT_SECONDS)
+    conn.execute(f"PRAGMA busy_timeout = {int(Config.CACHE_BUSY_TIMEOUT_SECONDS * 1000)}")
+    for attempt in range(Config.CACHE_OPEN_RETRIES + 1):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return conn
+        except sqlite3.OperationalError as e:
+            if attempt == Config.CACHE_OPEN_RETRIES or not _is_busy(e):
+                conn.close()
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+class CompressedCache:
+    """SQLite-backed key/value cache storing zlib-compressed text with size-bounded LRU eviction
+    
+    The cache fails open: if the database cannot be opened, read or written,
+    the error is logged and the caller carries on as if it were a miss.
+    """
+    
+    def __init__(self, path, max_bytes, ttl_seconds=None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+    
+    def _connection(self):
+        """Open the database on first use, retrying on later calls if opening failed (call with the lock held)"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = connect_sqlite(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            self._conn = conn
+        return self._conn
+    
+    def get(self, key):
+        """Return the cached text for key, or None on a miss or cache error"""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                
+                value, created_at = row
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+                
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+            
+            return zlib.decompress(value).decode('utf-8')
+        except (OSError, sqlite3.Error, zlib.error, UnicodeDecodeError) as e:
+            print(f"Warning: cache read failed for {self.path}: {e}")
+            return None
+    
+    def put(self, key, text):
+        """Store text under key, evicting least recently used entries over the size limit"""
+        value = zlib.compress(text.encode('utf-8'), Config.CACHE_COMPRESSION_LEVEL)
+        now = time.time()
+        try:
+            with self._lock:
+                self._connection().execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now)
+                )
+                self._evict()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: cache write failed for {self.path}: {e}")
+    
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        expired = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", expired)
+    
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._connection().execute("DELETE FROM entries")
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            entries, size = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': size
+        }
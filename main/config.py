@@ -7,21 +7,145 @@ class Config:
     # API
     MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
     MISTRAL_MODEL = "mistral-large-latest"
+    MISTRAL_TEMPERATURE = 0.3
+    MISTRAL_ENDPOINT = os.getenv("MISTRAL_ENDPOINT")
+    COMBINED_INSIGHTS = True
+    
+    # LLM request scheduling
+    LLM_REQUESTS_PER_SECOND = 5
+    LLM_BURST = 10
+    LLM_CONCURRENCY = 16
+    LLM_TIMEOUT_SECONDS = 60
+    LLM_MAX_RETRIES = 4
+    LLM_BACKOFF_BASE_SECONDS = 0.5
+    LLM_BACKOFF_MAX_SECONDS = 20
+    LLM_RETRY_BUDGET_RATIO = 0.2
+    LLM_RETRY_BUDGET_MIN = 10
+    LLM_CHARS_PER_TOKEN = 4
+    
+    # Prompt input: centrality-ranked sentences from the whole document instead of its first characters
+    PROMPT_SAMPLE_CHARS = 3000
+    DOCUMENT_TYPE_SAMPLE_CHARS = 1000
+    EXTRACTIVE_SELECTION = True
+    EXTRACTIVE_MAX_SENTENCES = 5000
+    EXTRACTIVE_MIN_SENTENCE_WORDS = 3
+    EXTRACTIVE_LEAD_SENTENCES = 2
+    
+    # Very long documents: opt-in map-reduce summarization. The extractive sampler above already
+    # draws the prompt from the whole document, so only texts well beyond its reach are worth the extra calls
+    LONG_DOC_MODE = False
+    LONG_DOC_THRESHOLD_CHARS = 1000000
+    LONG_DOC_CHUNK_TOKENS = 3000
+    LONG_DOC_CHUNK_SUMMARY_WORDS = 150
+    LONG_DOC_REDUCE_TOKENS = 6000
+    LONG_DOC_MAX_INPUT_TOKENS = 120000
+    LONG_DOC_CONCURRENCY = 8
     
     # File limits
     MAX_FILE_SIZE_MB = 300
     MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
     
+    # Uploads: chunked copies into per-session temp directories, reaped in the background
+    UPLOAD_ROOT = os.getenv("METADATA_UPLOAD_DIR", "temp_files")
+    UPLOAD_CHUNK_BYTES = 1024 * 1024
+    UPLOAD_DIR_TTL_SECONDS = 60 * 60
+    UPLOAD_ROOT_QUOTA_MB = 2048
+    # The quota pass only evicts directories idle at least this long, so live sessions keep their files
+    UPLOAD_QUOTA_MIN_IDLE_SECONDS = 10 * 60
+    UPLOAD_REAPER_INTERVAL_SECONDS = 5 * 60
+    
+    # Batch mode
+    BATCH_MAX_FILES = 50
+    BATCH_MAX_WORKERS = min(4, os.cpu_count() or 1)
+    BATCH_FILE_TIMEOUT_SECONDS = 300
+    BATCH_POLL_SECONDS = 0.5
+    # PDF, OCR and language detection workers inside each batch worker; the batch pool already fills the cores
+    BATCH_NESTED_WORKERS = 1
+    # 'spawn' works everywhere; 'forkserver' starts workers faster on Linux
+    BATCH_START_METHOD = 'spawn'
+    
+    # Extraction
+    IO_CHUNK_BYTES = 1024 * 1024
+    EXTRACTION_MAX_WORKERS = os.cpu_count() or 1
+    PDF_PARALLEL_MIN_PAGES = 50
+    PDF_SHARD_PAGES = 25
+    PDF_OCR_FALLBACK = True
+    PDF_OCR_MIN_CHARS = 25
+    TEXT_CHUNK_BYTES = 1024 * 1024
+    TEXT_FALLBACK_ENCODING = 'cp1252'
+    EXCEL_MAX_ROWS_PER_SHEET = None
+    EXCEL_MAX_CELLS_PER_SHEET = None
+    
+    # Caching
+    CACHE_DIR = os.getenv("METADATA_CACHE_DIR", ".cache")
+    CACHE_COMPRESSION_LEVEL = 6
+    CACHE_BUSY_TIMEOUT_SECONDS = 10
+    CACHE_OPEN_RETRIES = 5
+    EXTRACTION_CACHE_ENABLED = True
+    EXTRACTION_CACHE_PATH = os.path.join(CACHE_DIR, "extraction.sqlite3")
+    EXTRACTION_CACHE_MAX_MB = 512
+    LLM_CACHE_ENABLED = True
+    LLM_CACHE_PATH = os.path.join(CACHE_DIR, "llm_responses.sqlite3")
+    LLM_CACHE_MAX_MB = 256
+    LLM_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+    
+    # Local document type classifier, trained from logged LLM labels
+    DOC_TYPE_LOCAL_CLASSIFIER = True
+    DOC_TYPE_MODEL_PATH = os.getenv("DOC_TYPE_MODEL_PATH", os.path.join(CACHE_DIR, "doc_type_model.npz"))
+    # Opt-in: logging keeps a text sample of every analyzed document. The trained classifier only
+    # saves LLM calls with COMBINED_INSIGHTS off; with it on, it just overrides the combined answer
+    DOC_TYPE_LABEL_LOGGING = False
+    DOC_TYPE_LABEL_LOG = os.path.join(CACHE_DIR, "doc_type_labels.jsonl")
+    DOC_TYPE_LABEL_LOG_MAX_MB = 64
+    DOC_TYPE_CONFIDENCE_THRESHOLD = 0.8
+    DOC_TYPE_MIN_LABEL_EXAMPLES = 5
+    DOC_TYPE_HASH_FEATURES = 2 ** 16
+    
+    # Near-duplicate detection (MinHash LSH) to reuse insights of earlier revisions
+    NEAR_DUP_ENABLED = True
+    NEAR_DUP_INDEX_PATH = os.path.join(CACHE_DIR, "near_duplicates.sqlite3")
+    NEAR_DUP_SHINGLE_WORDS = 5
+    NEAR_DUP_NUM_PERM = 128
+    NEAR_DUP_BANDS = 16
+    NEAR_DUP_THRESHOLD = 0.8
+    NEAR_DUP_REUSE_INSIGHTS = True
+    # Keeping compressed texts enables "show differences" but stores every analyzed document
+    NEAR_DUP_STORE_TEXT = False
+    NEAR_DUP_MAX_MB = 256
+    NEAR_DUP_TTL_SECONDS = 90 * 24 * 60 * 60
+    
+    # OCR
+    OCR_DPI = 300
+    OCR_MAX_WORKERS = EXTRACTION_MAX_WORKERS
+    # Crashed PDF OCR pools are replaced this many times per document before OCR is given up
+    OCR_MAX_POOL_RESTARTS = 2
+    OCR_BINARIZE = False
+    OCR_BINARIZE_THRESHOLD = 160
+    OCR_TILE_HEIGHT = 4000
+    OCR_TILE_OVERLAP = 120
+    
     # Supported formats
     SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.doc', '.txt', '.xlsx', '.xls', '.md', '.jpg', '.jpeg', '.png', '.tiff', '.bmp']
     
     # Text analysis
     DEFAULT_READING_SPEED_WPM = 200
     MIN_TEXT_FOR_SUMMARY = 100
+    TOP_WORDS_SKETCH_CAPACITY = 2000
+    LANGUAGE_DETECTION_SEED = 0
+    LANGUAGE_SAMPLE_CHARS = 1000
+    LANGUAGE_SECTION_BUDGET = 16
+    # Sampled characters below which detection stays in process; the default budget is far below it
+    LANGUAGE_PARALLEL_MIN_CHARS = 200000
     
     # App config
     PAGE_TITLE = "Automatic Meta-Data Generation"
     PAGE_ICON = "📄"
+    APP_CACHE_MAX_ENTRIES = 64
+    # Extracted documents are held in memory; size the cache for uploads at the file size limit
+    APP_DOCUMENT_CACHE_MAX_MB = 2048
+    APP_DOCUMENT_CACHE_MAX_ENTRIES = max(1, APP_DOCUMENT_CACHE_MAX_MB // MAX_FILE_SIZE_MB)
+    APP_CACHE_TTL_SECONDS = 24 * 60 * 60
+    APP_INSIGHTS_WORKERS = 4
     
     @classmethod
     def validate(cls):
@@ -0,0 +1,79 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from config import Config
+from text_analyzer import compute_text_stats
+
+COUNT_METRICS = (
+    'word_count',
+    'sentence_count',
+    'paragraph_count',
+    'line_count',
+    'character_count',
+    'character_count_no_spaces',
+    'word_length_total'
+)
+
+def _count_row(text):
+    """Raw counts for one document (process pool worker, skips term counts)"""
+    stats = compute_text_stats(text)
+    return tuple(getattr(stats, metric) for metric in COUNT_METRICS)
+
+def _ratio(numerator, denominator):
+    """Element-wise division that yields 0 where the denominator is 0"""
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+def analyze_corpus(texts, max_workers=None, wpm=None):
+    """Analyze many documents into columnar NumPy arrays, one per metric
+    
+    Counting runs once per document; ratios, reading time and readability
+    buckets are then computed for the whole batch at once.
+    """
+    wpm = wpm or Config.DEFAULT_READING_SPEED_WPM
+    
+    if max_workers and max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            rows = list(pool.map(_count_row, texts, chunksize=16))
+    else:
+        rows = [_count_row(text) for text in texts]
+    
+    counts = np.array(rows, dtype=np.int64).reshape(-1, len(COUNT_METRICS))
+    metrics = {metric: counts[:, index] for index, metric in enumerate(COUNT_METRICS)}
+    
+    words = metrics['word_count']
+    sentences = metrics['sentence_count']
+    words_per_sentence = _ratio(words, sentences)
+    
+    metrics['avg_word_length'] = np.round(_ratio(metrics['character_count_no_spaces'], words), 1)
+    metrics['avg_sentence_length'] = np.round(words_per_sentence, 1)
+    metrics['reading_time_minutes'] = words / wpm
+    metrics['readability'] = np.select(
+        [sentences == 0, words_per_sentence < 15, words_per_sentence < 20],
+        ["N/A", "Easy", "Medium"],
+        default="Hard"
+    )
+    
+    return metrics
+
+def summarize_corpus(metrics, percentiles=(5, 25, 50, 75, 95), bins=10):
+    """Corpus summary with percentiles and histograms for each numeric metric"""
+    summary = {'document_count': int(len(metrics['word_count']))}
+    if not summary['document_count']:
+        return summary
+    
+    for metric, values in metrics.items():
+        if metric == 'readability':
+            labels, counts = np.unique(values, return_counts=True)
+            summary[metric] = {str(label): int(count) for label, count in zip(labels, counts)}
+            continue
+        
+        histogram, edges = np.histogram(values, bins=bins)
+        summary[metric] = {
+            'mean': float(values.mean()),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'total': float(values.sum()),
+            'percentiles': {p: float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))},
+            'histogram': {'counts': histogram.tolist(), 'bin_edges': edges.tolist()}
+        }
+    
+    return summary
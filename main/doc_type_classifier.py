@@ -0,0 +1,239 @@
+"""Local document type classifier trained from labels the LLM has already given
+
+Set Config.DOC_TYPE_LABEL_LOGGING to collect labels, train from the label log,
+then benchmark it against the LLM:
+
+    python main/doc_type_classifier.py train
+    python main/doc_type_classifier.py benchmark --llm-samples 50
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from config import Config
+from text_analyzer import _WORD_RE
+
+_label_log_lock = threading.Lock()
+_classifier = None
+_classifier_loaded = False
+
+def normalize_label(label):
+    """Canonical form of an LLM document type answer, or None if it is not a usable label"""
+    label = re.sub(r'[^A-Za-z /&-]', '', str(label or "")).strip()
+    if not label or label.lower() == 'unknown' or len(label.split()) > 3:
+        return None
+    return label.title()
+
+def hashed_features(text, n_features, ngram_size=2):
+    """Hashed word n-gram features as (indices, values), log-scaled and L2-normalized"""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    
+    # Word hashes are stable across processes (unlike hash()); n-gram hashes are rolled from them
+    word_hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words))
+    grams = [word_hashes]
+    rolling = word_hashes
+    for size in range(2, ngram_size + 1):
+        rolling = rolling[:-1] * np.uint64(1000003) ^ word_hashes[size - 1:]
+        grams.append(rolling)
+    
+    indices, counts = np.unique(np.concatenate(grams) % np.uint64(n_features), return_counts=True)
+    values = 1 + np.log(counts.astype(np.float32))
+    return indices.astype(np.int64), values / np.linalg.norm(values)
+
+class HashedNgramClassifier:
+    """Multinomial logistic regression over hashed word n-grams"""
+    
+    def __init__(self, labels, n_features=None, ngram_size=2):
+        self.labels = list(labels)
+        self.n_features = n_features or Config.DOC_TYPE_HASH_FEATURES
+        self.ngram_size = ngram_size
+        self.weights = np.zeros((len(self.labels), self.n_features), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+    
+    def _probabilities(self, indices, values):
+        scores = self.weights[:, indices] @ values + self.bias
+        scores = np.exp(scores - scores.max())
+        return scores / scores.sum()
+    
+    def fit(self, texts, labels, epochs=10, learning_rate=0.5, l2=1e-6, seed=0):
+        """Train with per-example SGD on sparse features"""
+        label_index = {label: index for index, label in enumerate(self.labels)}
+        examples = [(hashed_features(text, self.n_features, self.ngram_size), label_index[label])
+                    for text, label in zip(texts, labels)]
+        rng = random.Random(seed)
+        
+        for epoch in range(epochs):
+            rng.shuffle(examples)
+            rate = learning_rate / (1 + epoch)
+            for (indices, values), target in examples:
+                gradient = self._probabilities(indices, values)
+                gradient[target] -= 1
+                self.weights[:, indices] -= rate * (np.outer(gradient, values) + l2 * self.weights[:, indices])
+                self.bias -= rate * gradient
+        return self
+    
+    def predict(self, text):
+        """(label, confidence) for a text"""
+        probabilities = self._probabilities(*hashed_features(text, self.n_features, self.ngram_size))
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+    
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'wb') as handle:
+            np.savez_compressed(
+                handle,
+                labels=np.array(self.labels),
+                weights=self.weights,
+                bias=self.bias,
+                ngram_size=self.ngram_size
+            )
+    
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            classifier = cls(data['labels'].tolist(), data['weights'].shape[1], int(data['ngram_size']))
+            classifier.weights = data['weights']
+            classifier.bias = data['bias']
+        return classifier
+
+def get_doc_type_classifier():
+    """Load the trained classifier once, or None if no model has been trained"""
+    global _classifier, _classifier_loaded
+    if not _classifier_loaded:
+        _classifier_loaded = True
+        if os.path.exists(Config.DOC_TYPE_MODEL_PATH):
+            try:
+                _classifier = HashedNgramClassifier.load(Config.DOC_TYPE_MODEL_PATH)
+            except Exception as e:
+                print(f"Error loading document type model: {e}")
+    return _classifier
+
+def classify_locally(text_sample):
+    """Local label if the classifier is confident enough, otherwise None"""
+    classifier = get_doc_type_classifier() if Config.DOC_TYPE_LOCAL_CLASSIFIER else None
+    if classifier is None:
+        return None
+    
+    label, confidence = classifier.predict(text_sample)
+    return label if confidence >= Config.DOC_TYPE_CONFIDENCE_THRESHOLD else None
+
+def _rotated_log_path(path):
+    return path + ".1"
+
+def log_document_type_label(text_sample, label):
+    """Append an LLM-given label to the training log, rotating it once it reaches its size limit"""
+    label = normalize_label(label)
+    if not Config.DOC_TYPE_LABEL_LOGGING or not label or not text_sample:
+        return
+    
+    path = Config.DOC_TYPE_LABEL_LOG
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        record = json.dumps({'text': text_sample, 'label': label}, ensure_ascii=False)
+        with _label_log_lock:
+            # One previous log is kept, so the store never holds more than twice the limit
+            if os.path.exists(path) and os.path.getsize(path) >= Config.DOC_TYPE_LABEL_LOG_MAX_MB * 1024 * 1024:
+                os.replace(path, _rotated_log_path(path))
+            with open(path, 'a', encoding='utf-8') as handle:
+                handle.write(record + "\n")
+    except OSError as e:
+        print(f"Error logging document type label: {e}")
+
+def load_label_log(path=None, min_examples=None):
+    """(texts, labels) from the label log and its rotated predecessor, deduplicated, dropping labels with too few examples"""
+    path = path or Config.DOC_TYPE_LABEL_LOG
+    min_examples = Config.DOC_TYPE_MIN_LABEL_EXAMPLES if min_examples is None else min_examples
+    
+    records = {}
+    for log_path in (_rotated_log_path(path), path):
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                label = normalize_label(record.get('label'))
+                if label and record.get('text'):
+                    records[record['text']] = label
+    
+    counts = {}
+    for label in records.values():
+        counts[label] = counts.get(label, 0) + 1
+    
+    pairs = [(text, label) for text, label in records.items() if counts[label] >= min_examples]
+    return [text for text, _ in pairs], [label for _, label in pairs]
+
+def train_classifier(texts, labels, **fit_options):
+    """Train a classifier on (text, label) examples"""
+    return HashedNgramClassifier(sorted(set(labels))).fit(texts, labels, **fit_options)
+
+def benchmark_classifier(texts, labels, test_fraction=0.2, llm_samples=0, seed=0):
+    """Accuracy and latency of the local classifier on a held-out split, optionally against the LLM"""
+    # Imported here: summary_generator uses this module for local classification
+    from summary_generator import classify_document_type_llm
+    
+    pairs = list(zip(texts, labels))
+    random.Random(seed).shuffle(pairs)
+    split = max(1, int(len(pairs) * test_fraction))
+    test, train = pairs[:split], pairs[split:]
+    classifier = train_classifier([text for text, _ in train], [label for _, label in train])
+    
+    predictions = []
+    started = time.perf_counter()
+    for text, _ in test:
+        predictions.append(classifier.predict(text))
+    local_seconds = time.perf_counter() - started
+    
+    confident = [(predicted, label) for (predicted, confidence), (_, label) in zip(predictions, test)
+                 if confidence >= Config.DOC_TYPE_CONFIDENCE_THRESHOLD]
+    report = {
+        'train_examples': len(train),
+        'test_examples': len(test),
+        'labels': len(classifier.labels),
+        'local_accuracy': sum(predicted == label for (predicted, _), (_, label) in zip(predictions, test)) / len(test),
+        'local_microseconds_per_document': local_seconds / len(test) * 1e6,
+        'confidence_threshold': Config.DOC_TYPE_CONFIDENCE_THRESHOLD,
+        'confident_coverage': len(confident) / len(test),
+        'confident_accuracy': sum(predicted == label for predicted, label in confident) / len(confident) if confident else None
+    }
+    
+    if llm_samples:
+        sample = test[:llm_samples]
+        started = time.perf_counter()
+        answers = [normalize_label(classify_document_type_llm(text)) for text, _ in sample]
+        report['llm_documents'] = len(sample)
+        report['llm_seconds_per_document'] = (time.perf_counter() - started) / len(sample)
+        report['llm_agreement_with_log'] = sum(answer == label for answer, (_, label) in zip(answers, sample)) / len(sample)
+    
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or benchmark the local document type classifier")
+    parser.add_argument('command', choices=['train', 'benchmark'])
+    parser.add_argument('--log', default=Config.DOC_TYPE_LABEL_LOG, help="Label log (JSONL of text/label)")
+    parser.add_argument('--model', default=Config.DOC_TYPE_MODEL_PATH)
+    parser.add_argument('--llm-samples', type=int, default=0, help="Held-out documents to also classify with the LLM")
+    args = parser.parse_args()
+    
+    texts, labels = load_label_log(args.log)
+    if not texts:
+        parser.error(f"No usable labels in {args.log}")
+    
+    if args.command == 'train':
+        train_classifier(texts, labels).save(args.model)
+        print(f"Trained on {len(texts)} documents, {len(set(labels))} labels -> {args.model}")
+    else:
+        print(json.dumps(benchmark_classifier(texts, labels, llm_samples=args.llm_samples), indent=2))
+
+if __name__ == "__main__":
+    main()
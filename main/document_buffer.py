@@ -0,0 +1,147 @@
+import json
+import re
+from array import array
+from bisect import bisect_right
+from text_analyzer import compute_text_stats, _NON_SPACE_RE
+
+# Same sentences as text_analyzer's sentence scan, with surrounding whitespace left out of the span
+_SENTENCE_SPAN_RE = re.compile(r'\s*([^\s.!?](?:[^.!?]*[^\s.!?])?)')
+
+class DocumentBuffer:
+    """Extracted text stored once, with integer offset indexes for pages, paragraphs and sentences
+    
+    Every stage reads the same string through offsets; only the slice a caller
+    asks for is materialized, never another full copy of the document.
+    """
+    
+    def __init__(self, text, page_starts=None, page_labels=None):
+        self.text = text or ""
+        self.page_starts = array('q', page_starts or [0])
+        self.page_labels = list(page_labels) if page_labels else [f"Page {index + 1}" for index in range(len(self.page_starts))]
+        # (page_number, error) for pages whose OCR failed; such buffers are never cached
+        self.ocr_failures = []
+        self._paragraph_spans = None
+        self._sentence_spans = None
+        self._stats = None
+    
+    @classmethod
+    def from_pages(cls, pages, separator="\n"):
+        """Build a buffer from (label, text) pairs, recording where each page starts"""
+        pieces = []
+        page_starts = array('q')
+        page_labels = []
+        offset = 0
+        
+        for label, text in pages:
+            if pieces:
+                pieces.append(separator)
+                offset += len(separator)
+            page_starts.append(offset)
+            page_labels.append(label)
+            pieces.append(text)
+            offset += len(text)
+        
+        return cls("".join(pieces), page_starts, page_labels)
+    
+    @classmethod
+    def from_json(cls, payload):
+        """Rebuild a buffer serialized with to_json"""
+        data = json.loads(payload)
+        return cls(data['text'], data['page_starts'], data['page_labels'])
+    
+    def to_json(self):
+        """Serialize text and page index (paragraph and sentence indexes are rebuilt lazily)"""
+        return json.dumps({
+            'text': self.text,
+            'page_starts': self.page_starts.tolist(),
+            'page_labels': self.page_labels
+        }, ensure_ascii=False)
+    
+    def __len__(self):
+        return len(self.text)
+    
+    def __str__(self):
+        return self.text
+    
+    @property
+    def stats(self):
+        """Text statistics, computed once and shared by every analyzer"""
+        if self._stats is None:
+            self._stats = compute_text_stats(self.text)
+        return self._stats
+    
+    @property
+    def page_count(self):
+        return len(self.page_starts)
+    
+    def page_span(self, index):
+        """(start, end) offsets of a page"""
+        end = self.page_starts[index + 1] if index + 1 < len(self.page_starts) else len(self.text)
+        return self.page_starts[index], end
+    
+    def page(self, index):
+        """Text of a single page"""
+        start, end = self.page_span(index)
+        return self.text[start:end]
+    
+    def iter_pages(self):
+        """Yield (label, text) per page, slicing lazily"""
+        for index, label in enumerate(self.page_labels):
+            yield label, self.page(index)
+    
+    def page_of(self, offset):
+        """Index of the page that contains offset"""
+        return max(0, bisect_right(self.page_starts, offset) - 1)
+    
+    @property
+    def paragraph_spans(self):
+        """Flat array of (start, end) pairs for non-blank paragraphs separated by a blank line"""
+        if self._paragraph_spans is None:
+            spans = array('q')
+            text = self.text
+            start = 0
+            while start <= len(text):
+                end = text.find('\n\n', start)
+                if end < 0:
+                    end = len(text)
+                if _NON_SPACE_RE.search(text, start, end):
+                    spans.extend((start, end))
+                start = end + 2
+            self._paragraph_spans = spans
+        return self._paragraph_spans
+    
+    @property
+    def sentence_spans(self):
+        """Flat array of (start, end) pairs for sentences"""
+        if self._sentence_spans is None:
+            spans = array('q')
+            for match in _SENTENCE_SPAN_RE.finditer(self.text):
+                spans.extend(match.span(1))
+            self._sentence_spans = spans
+        return self._sentence_spans
+    
+    def _iter_spans(self, spans):
+        for index in range(0, len(spans), 2):
+            yield self.text[spans[index]:spans[index + 1]]
+    
+    def iter_paragraphs(self):
+        """Yield paragraph texts lazily"""
+        return self._iter_spans(self.paragraph_spans)
+    
+    def iter_sentences(self):
+        """Yield sentence texts lazily"""
+        return self._iter_spans(self.sentence_spans)
+    
+    def iter_chunks(self, size):
+        """Yield consecutive slices of at most size characters, for streaming analysis"""
+        for start in range(0, len(self.text), size):
+            yield self.text[start:start + size]
+    
+    def sample(self, max_chars):
+        """Whitespace-normalized text from the start of the document, at most max_chars long"""
+        limit = max_chars
+        while True:
+            cleaned = " ".join(self.text[:limit].split())
+            if len(cleaned) >= max_chars or limit >= len(self.text):
+                return cleaned[:max_chars]
+            limit *= 2
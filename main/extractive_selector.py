@@ -0,0 +1,87 @@
+import math
+from collections import Counter
+from document_buffer import DocumentBuffer
+from text_analyzer import STOP_WORDS, _WORD_RE
+from config import Config
+
+def _sentence_terms(sentence):
+    return [word for word in (match.group().lower() for match in _WORD_RE.finditer(sentence))
+            if word not in STOP_WORDS and len(word) > 2]
+
+def _with_delimiter(text, start, end):
+    """Extend a sentence span over its closing punctuation"""
+    while end < len(text) and text[end] in '.!?':
+        end += 1
+    return start, end
+
+def rank_sentences(text, max_sentences=None):
+    """Score sentences by TF-IDF cosine similarity to the document centroid
+    
+    Returns (score, start, end) tuples in document order. Past max_sentences,
+    sentences are sampled evenly so ranking cost stays bounded.
+    """
+    max_sentences = max_sentences or Config.EXTRACTIVE_MAX_SENTENCES
+    buffer = DocumentBuffer(text)
+    spans = buffer.sentence_spans
+    count = len(spans) // 2
+    indexes = range(count) if count <= max_sentences else [int(i * count / max_sentences) for i in range(max_sentences)]
+    
+    sentences = []
+    for index in indexes:
+        start, end = _with_delimiter(text, spans[2 * index], spans[2 * index + 1])
+        terms = Counter(_sentence_terms(text[start:end]))
+        if sum(terms.values()) >= Config.EXTRACTIVE_MIN_SENTENCE_WORDS:
+            sentences.append((start, end, terms))
+    
+    # Inverse document frequency over sentences, then the centroid of the tf-idf vectors
+    document_frequency = Counter()
+    for _, _, terms in sentences:
+        document_frequency.update(terms.keys())
+    idf = {term: math.log(len(sentences) / frequency) + 1 for term, frequency in document_frequency.items()}
+    
+    vectors = []
+    centroid = Counter()
+    for start, end, terms in sentences:
+        vector = {term: (1 + math.log(tf)) * idf[term] for term, tf in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        vector = {term: weight / norm for term, weight in vector.items()}
+        centroid.update(vector)
+        vectors.append((start, end, vector))
+    
+    centroid_norm = math.sqrt(sum(weight * weight for weight in centroid.values())) or 1.0
+    return [(sum(weight * centroid[term] for term, weight in vector.items()) / centroid_norm, start, end)
+            for start, end, vector in vectors]
+
+def select_key_sentences(text, max_chars, lead_sentences=None):
+    """Most central sentences of the whole document, in original order, within max_chars
+    
+    The first lead_sentences sentences are always kept, since titles and
+    openings carry most of a document's type. Text already within the budget
+    is returned unchanged.
+    """
+    if not text or len(text) <= max_chars:
+        return text
+    lead_sentences = Config.EXTRACTIVE_LEAD_SENTENCES if lead_sentences is None else lead_sentences
+    
+    ranked = rank_sentences(text)
+    if not ranked:
+        return text[:max_chars]
+    
+    lead = set(range(min(lead_sentences, len(ranked))))
+    order = sorted(range(len(ranked)), key=lambda index: (index not in lead, -ranked[index][0]))
+    
+    chosen = []
+    used = 0
+    seen = set()
+    for index in order:
+        _, start, end = ranked[index]
+        sentence = " ".join(text[start:end].split())
+        if sentence in seen or used + len(sentence) + 1 > max_chars:
+            continue
+        seen.add(sentence)
+        chosen.append(index)
+        used += len(sentence) + 1
+    
+    if not chosen:
+        return text[:max_chars]
+    return " ".join(" ".join(text[ranked[index][1]:ranked[index][2]].split()) for index in sorted(chosen))
@@ -1,6 +1,12 @@
 import os
+import shutil
 import tempfile
+import threading
+import time
+import uuid
 import streamlit as st
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
 from config import Config
 
@@ -14,48 +20,166 @@ def handle_file_upload():
     
     return uploaded_file
 
-def save_temporary_file(uploaded_file):
-    """Save uploaded file to temporary location"""
+def handle_batch_upload():
+    """Handle multi-file upload in Streamlit"""
+    return st.file_uploader(
+        "Upload your documents",
+        type=[ext.replace('.', '') for ext in Config.SUPPORTED_EXTENSIONS],
+        accept_multiple_files=True,
+        help=f"Up to {Config.BATCH_MAX_FILES} files | Max size: {Config.MAX_FILE_SIZE_MB}MB each"
+    )
+
+_reaper_started = False
+_reaper_lock = threading.Lock()
+_active_dirs = Counter()
+_active_dirs_lock = threading.Lock()
+
+def get_session_id():
+    """Stable id for the current Streamlit session, used to scope its temp directory"""
+    if 'upload_session_id' not in st.session_state:
+        st.session_state['upload_session_id'] = uuid.uuid4().hex
+    return st.session_state['upload_session_id']
+
+def session_temp_dir(session_id=None):
+    """Temp directory owned by one session or job, refreshed so the reaper sees it as active"""
+    temp_dir = Path(Config.UPLOAD_ROOT) / (session_id or get_session_id())
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    os.utime(temp_dir)
+    return temp_dir
+
+@contextmanager
+def temp_dir_in_use(session_id=None):
+    """Keep the reaper away from a session's directory while a job still reads files from it"""
+    name = session_id or get_session_id()
+    with _active_dirs_lock:
+        _active_dirs[name] += 1
+    try:
+        yield session_temp_dir(name)
+    finally:
+        with _active_dirs_lock:
+            _active_dirs[name] -= 1
+            if not _active_dirs[name]:
+                del _active_dirs[name]
+
+def _copy_upload(uploaded_file, destination):
+    """Copy an upload in fixed-size chunks, leaving its position where it was"""
+    position = uploaded_file.tell() if hasattr(uploaded_file, 'tell') else 0
+    if hasattr(uploaded_file, 'seek'):
+        uploaded_file.seek(0)
+    shutil.copyfileobj(uploaded_file, destination, Config.UPLOAD_CHUNK_BYTES)
+    if hasattr(uploaded_file, 'seek'):
+        uploaded_file.seek(position)
+
+def save_temporary_file(uploaded_file, session_id=None):
+    """Save uploaded file to a temporary location in the session's directory"""
     if not uploaded_file:
         return None
     
     try:
-        # Create temp directory if it doesn't exist
-        temp_dir = Path("temp_files")
-        temp_dir.mkdir(exist_ok=True)
-        
-        # Create temporary file
-        file_extension = Path(uploaded_file.name).suffix
         temp_file = tempfile.NamedTemporaryFile(
-            delete=False, 
-            suffix=file_extension,
-            dir=temp_dir
+            delete=False,
+            suffix=Path(uploaded_file.name).suffix,
+            dir=session_temp_dir(session_id)
         )
-        
-        # Write file content
-        temp_file.write(uploaded_file.read())
-        temp_file.close()
-        
-        # Reset file pointer for further use
-        uploaded_file.seek(0)
-        
+        with temp_file:
+            _copy_upload(uploaded_file, temp_file)
         return temp_file.name
     
     except Exception as e:
         st.error(f"Error saving file: {str(e)}")
         return None
 
-def cleanup_temp_files():
-    """Clean up temporary files"""
+def cleanup_temp_files(session_id=None):
+    """Clean up the temporary files of this session only"""
     try:
-        temp_dir = Path("temp_files")
+        temp_dir = Path(Config.UPLOAD_ROOT) / (session_id or get_session_id())
         if temp_dir.exists():
-            for file_path in temp_dir.glob("*"):
-                if file_path.is_file():
-                    file_path.unlink()
+            shutil.rmtree(temp_dir)
     except Exception as e:
         print(f"Warning: Could not cleanup temp files: {e}")
 
+def _directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def reap_temp_dirs(ttl_seconds=None, quota_bytes=None, keep=(), min_idle_seconds=None):
+    """Remove session directories idle longer than ttl_seconds, then the oldest ones over the size quota
+    
+    Returns the number of directories removed. Directories named in keep or
+    held by temp_dir_in_use are never removed, and the quota pass only evicts
+    directories idle for at least min_idle_seconds.
+    """
+    ttl_seconds = Config.UPLOAD_DIR_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    quota_bytes = Config.UPLOAD_ROOT_QUOTA_MB * 1024 * 1024 if quota_bytes is None else quota_bytes
+    min_idle_seconds = Config.UPLOAD_QUOTA_MIN_IDLE_SECONDS if min_idle_seconds is None else min_idle_seconds
+    root = Path(Config.UPLOAD_ROOT)
+    if not root.exists():
+        return 0
+    
+    with _active_dirs_lock:
+        keep = set(keep) | set(_active_dirs)
+    
+    now = time.time()
+    directories = []
+    for path in root.iterdir():
+        if not path.is_dir() or path.name in keep:
+            continue
+        try:
+            directories.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    
+    removed = 0
+    remaining = []
+    for modified, path in sorted(directories):
+        if now - modified > ttl_seconds:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        else:
+            remaining.append((modified, path, _directory_size(path)))
+    
+    # Active directories still count towards the quota, they just cannot be evicted
+    total = sum(size for _, _, size in remaining) + sum(_directory_size(root / name) for name in keep)
+    for modified, path, size in remaining:
+        if total <= quota_bytes:
+            break
+        if now - modified < min_idle_seconds:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    
+    return removed
+
+def _reap_forever(interval):
+    while True:
+        try:
+            reap_temp_dirs()
+        except Exception as e:
+            print(f"Warning: temp directory reaper failed: {e}")
+        time.sleep(interval)
+
+def start_temp_reaper(interval=None):
+    """Start the background temp directory reaper once per process"""
+    global _reaper_started
+    with _reaper_lock:
+        if _reaper_started:
+            return
+        _reaper_started = True
+    
+    threading.Thread(
+        target=_reap_forever,
+        args=(interval or Config.UPLOAD_REAPER_INTERVAL_SECONDS,),
+        name="temp-dir-reaper",
+        daemon=True
+    ).start()
+
 def get_file_size_mb(file):
     """Get file size in MB"""
     if hasattr(file, 'size'):
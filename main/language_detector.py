@@ -1,16 +1,26 @@
-from langdetect import detect, detect_langs
+from concurrent.futures import ProcessPoolExecutor
+from langdetect import DetectorFactory
+from langdetect import detector_factory
 from langdetect.lang_detect_exception import LangDetectException
+from config import Config
+
+# A fixed seed makes langdetect's sampler return the same answer for the same text
+DetectorFactory.seed = Config.LANGUAGE_DETECTION_SEED
+
+def warm_up_language_profiles():
+    """Load the n-gram language profiles once per process (use as a worker initializer)"""
+    detector_factory.init_factory()
+    return detector_factory._factory
+
+def _detect_probabilities(text):
+    """Run the preloaded detector on a text sample, most likely language first"""
+    detector = warm_up_language_profiles().create()
+    detector.append(text[:Config.LANGUAGE_SAMPLE_CHARS])
+    return detector.get_probabilities()
 
 def detect_language(text):
     """Detect the primary language of text"""
-    if not text or len(text.strip()) < 10:
-        return "Unknown"
-    
-    try:
-        lang_code = detect(text[:1000])  # Use first 1000 chars for efficiency
-        return get_language_name(lang_code)
-    except LangDetectException:
-        return "Unknown"
+    return detect_language_with_confidence(text)[0]
 
 def detect_language_with_confidence(text):
     """Detect language with confidence score"""
@@ -18,7 +28,7 @@ def detect_language_with_confidence(text):
         return "Unknown", 0.0
     
     try:
-        lang_probs = detect_langs(text[:1000])
+        lang_probs = _detect_probabilities(text)
         if lang_probs:
             top_lang = lang_probs[0]
             return get_language_name(top_lang.lang), round(top_lang.prob, 2)
@@ -27,6 +37,97 @@ def detect_language_with_confidence(text):
     
     return "Unknown", 0.0
 
+_detection_pools = {}
+
+def _get_detection_pool(max_workers):
+    """Long-lived process pool whose workers load the language profiles once at startup"""
+    if max_workers not in _detection_pools:
+        _detection_pools[max_workers] = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=warm_up_language_profiles
+        )
+    return _detection_pools[max_workers]
+
+def detect_many(texts, max_workers=None):
+    """Detect (language, confidence) for many texts, reusing one set of loaded profiles per worker"""
+    if max_workers and max_workers > 1:
+        pool = _get_detection_pool(max_workers)
+        return list(pool.map(detect_language_with_confidence, texts, chunksize=max(1, len(texts) // (max_workers * 4))))
+    
+    warm_up_language_profiles()
+    return [detect_language_with_confidence(text) for text in texts]
+
+def _evenly_spaced(items, budget):
+    """Pick at most budget items spread evenly across a list"""
+    if len(items) <= budget:
+        return items
+    step = len(items) / budget
+    return [items[int(index * step)] for index in range(budget)]
+
+def _sample_sections(text, sections, budget, window_chars):
+    """Build (label, start, end, weight) windows: one per section, or evenly spaced over the text"""
+    if sections:
+        windows = []
+        for label, start, end in _evenly_spaced(list(sections), budget):
+            # Sample the middle of the section; weight it by the section's full length
+            offset = start + max(0, (end - start - window_chars) // 2)
+            windows.append((label, offset, min(end, offset + window_chars), end - start))
+        return windows
+    
+    count = min(budget, max(1, -(-len(text) // window_chars)))
+    step = max(0, len(text) - window_chars) / max(1, count - 1)
+    weight = len(text) / count
+    return [(f"Window {index + 1}", int(index * step), min(len(text), int(index * step) + window_chars), weight)
+            for index in range(count)]
+
+def detect_language_sections(text, sections=None, sample_budget=None, window_chars=None, max_workers=None):
+    """Per-section language map for mixed-language documents
+    
+    sections is an optional list of (label, start, end) offsets, such as the
+    pages of a DocumentBuffer. At most sample_budget windows are detected, so
+    the cost does not grow with document length. Windows are detected in
+    process unless they add up to Config.LANGUAGE_PARALLEL_MIN_CHARS, when the
+    shared detection pool is worth its IPC; max_workers overrides the choice.
+    """
+    text = text or ""
+    sample_budget = sample_budget or Config.LANGUAGE_SECTION_BUDGET
+    window_chars = window_chars or Config.LANGUAGE_SAMPLE_CHARS
+    
+    windows = _sample_sections(text, sections, sample_budget, window_chars)
+    if max_workers is None and sum(end - start for _, start, end, _ in windows) >= Config.LANGUAGE_PARALLEL_MIN_CHARS:
+        max_workers = Config.EXTRACTION_MAX_WORKERS
+    results = detect_many([text[start:end] for _, start, end, _ in windows], max_workers)
+    
+    weights = {}
+    section_map = []
+    for (label, start, end, weight), (language, confidence) in zip(windows, results):
+        section_map.append({
+            'section': label,
+            'start': start,
+            'end': end,
+            'language': language,
+            'confidence': confidence
+        })
+        if language != "Unknown":
+            weights[language] = weights.get(language, 0) + weight
+    
+    total = sum(weights.values())
+    coverage = {language: round(weight / total * 100, 1)
+                for language, weight in sorted(weights.items(), key=lambda item: -item[1])}
+    
+    return {
+        'dominant_language': next(iter(coverage), "Unknown"),
+        'coverage': coverage,
+        'sections': section_map
+    }
+
+def detect_document_languages(document, sample_budget=None, max_workers=None):
+    """Per-page language map for a DocumentBuffer"""
+    sections = [(label, *document.page_span(index)) for index, label in enumerate(document.page_labels)]
+    if len(sections) <= 1:
+        sections = None
+    return detect_language_sections(document.text, sections, sample_budget, max_workers=max_workers)
+
 def get_language_name(lang_code):
     """Convert language code to language name"""
     lang_map = {
@@ -86,12 +187,18 @@ def get_language_name(lang_code):
     
     return lang_map.get(lang_code, f"Unknown ({lang_code})")
 
-def analyze_language(text):
-    """Complete language analysis"""
-    language, confidence = detect_language_with_confidence(text)
-    
+def _language_result(language, confidence):
+    """Format a detection result as returned by analyze_language"""
     return {
         'detected_language': language,
         'confidence': f"{confidence * 100:.1f}%",
         'is_reliable': confidence > 0.7
-    }
\ No newline at end of file
+    }
+
+def analyze_language(text):
+    """Complete language analysis"""
+    return _language_result(*detect_language_with_confidence(text))
+
+def analyze_language_many(texts, max_workers=None):
+    """Language analysis for a batch of texts, same result shape as analyze_language"""
+    return [_language_result(language, confidence) for language, confidence in detect_many(texts, max_workers)]
\ No newline at end of file
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from langchain_mistralai import ChatMistralAI
+from config import Config
+from summary_generator import build_insights_prompt, parse_insights_response, get_llm_cache, llm_cache_key, prompt_text_sample, finish_insights
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by every coroutine and thread in the process"""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _take(self, tokens):
+        """Take tokens if available, otherwise return how long to wait for them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+    
+    async def acquire(self, tokens=1):
+        """Wait until tokens are available"""
+        while True:
+            wait = self._take(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+class RetryBudget:
+    """Caps retries at a fraction of requests so a failing API is not hammered with retries"""
+    
+    def __init__(self, ratio, minimum):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+    
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+    
+    def try_spend(self):
+        """Reserve one retry if the budget allows it"""
+        with self._lock:
+            if self.retries < self.minimum + self.ratio * self.requests:
+                self.retries += 1
+                return True
+            return False
+
+_rate_limiter = None
+_retry_budget = None
+_async_clients = weakref.WeakKeyDictionary()
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Get the process-wide LLM rate limiter sized from Config"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucket(Config.LLM_REQUESTS_PER_SECOND, Config.LLM_BURST)
+    return _rate_limiter
+
+def get_retry_budget():
+    """Get the process-wide LLM retry budget"""
+    global _retry_budget
+    if _retry_budget is None:
+        _retry_budget = RetryBudget(Config.LLM_RETRY_BUDGET_RATIO, Config.LLM_RETRY_BUDGET_MIN)
+    return _retry_budget
+
+def get_async_client():
+    """Get a Mistral client for the running event loop
+    
+    Retries are handled here, so the client itself makes a single attempt.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        options = {
+            'mistral_api_key': Config.MISTRAL_API_KEY,
+            'model': Config.MISTRAL_MODEL,
+            'temperature': Config.MISTRAL_TEMPERATURE,
+            'max_retries': 1,
+            'timeout': Config.LLM_TIMEOUT_SECONDS
+        }
+        if Config.MISTRAL_ENDPOINT:
+            options['endpoint'] = Config.MISTRAL_ENDPOINT
+        _async_clients[loop] = ChatMistralAI(**options)
+    return _async_clients[loop]
+
+def get_event_loop():
+    """Get the process-wide event loop for blocking callers, running on a daemon thread"""
+    global _loop, _loop_pid
+    with _loop_lock:
+        # A forked worker inherits the loop object but not the thread running it
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return _loop
+
+def run_coroutine(coroutine):
+    """Run a coroutine on the shared event loop and wait for its result
+    
+    Blocking entry points all go through this one long-lived loop, so they
+    share its async client and connection pool instead of building new ones
+    per call. Must not be called from the loop's own thread.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop()).result()
+
+def is_retryable_error(error):
+    """Check if an LLM error is worth retrying (timeouts, 429s and 5xx responses)"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    
+    response = getattr(error, 'response', None)
+    status = (getattr(error, 'status_code', None)
+              or getattr(error, 'http_status', None)
+              or getattr(response, 'status_code', None))
+    if status:
+        return status == 429 or status >= 500
+    
+    message = str(error).lower()
+    return any(marker in message for marker in ('429', 'rate limit', 'timeout', 'timed out', 'connection'))
+
+async def ainvoke_with_retry(prompt, client=None, timeout=None, max_retries=None):
+    """Invoke the LLM under the shared rate limiter, retrying with exponential backoff and full jitter"""
+    client = client or get_async_client()
+    timeout = timeout or Config.LLM_TIMEOUT_SECONDS
+    max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+    budget = get_retry_budget()
+    budget.record_request()
+    
+    attempt = 0
+    while True:
+        await get_rate_limiter().acquire()
+        try:
+            response = await asyncio.wait_for(client.ainvoke(prompt), timeout)
+            return response.content
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e) or not budget.try_spend():
+                raise
+            delay = min(Config.LLM_BACKOFF_MAX_SECONDS, Config.LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)
+            await asyncio.sleep(random.uniform(0, delay))
+            attempt += 1
+
+async def ainvoke_cached(template, prompt, is_valid=None):
+    """Async invoke answering from the LLM response cache shared with the blocking path"""
+    if not Config.LLM_CACHE_ENABLED:
+        return await ainvoke_with_retry(prompt)
+    
+    key = llm_cache_key(template, prompt)
+    cached = get_llm_cache().get(key)
+    if cached is not None:
+        return cached
+    
+    content = await ainvoke_with_retry(prompt)
+    if is_valid is None or is_valid(content):
+        get_llm_cache().put(key, content)
+    return content
+
+async def agenerate_combined_insights(text, max_words=200, num_points=5):
+    """Summary, key points and document type from one structured LLM call"""
+    text_sample = prompt_text_sample(text, Config.PROMPT_SAMPLE_CHARS)
+    
+    try:
+        content = await ainvoke_cached(
+            'insights',
+            build_insights_prompt(text_sample, max_words, num_points),
+            is_valid=lambda answer: parse_insights_response(answer, num_points) is not None
+        )
+    except Exception as e:
+        return {
+            'summary': f"Error generating summary: {str(e)}",
+            'key_points': [],
+            'document_type': "Unknown"
+        }
+    
+    return parse_insights_response(content, num_points) or {
+        'summary': content.strip(),
+        'key_points': [],
+        'document_type': "Unknown"
+    }
+
+async def agenerate_document_insights(text, max_words=200, num_points=5):
+    """Async version of generate_document_insights, with the same long-document routing and post-processing"""
+    if not text or len(text.strip()) < Config.MIN_TEXT_FOR_SUMMARY:
+        return {
+            'summary': "Text too short for analysis",
+            'key_points': [],
+            'document_type': "Unknown"
+        }
+    
+    if Config.LONG_DOC_MODE and len(text) > Config.LONG_DOC_THRESHOLD_CHARS:
+        # Imported here: long_summarizer imports this module
+        from long_summarizer import asummarize_long_document
+        insights = await asummarize_long_document(text, max_words, num_points)
+    else:
+        insights = await agenerate_combined_insights(text, max_words, num_points)
+    return finish_insights(text, insights)
+
+async def agenerate_insights_many(texts, concurrency=None):
+    """Generate insights for many documents concurrently, in input order"""
+    semaphore = asyncio.Semaphore(concurrency or Config.LLM_CONCURRENCY)
+    
+    async def run(text):
+        async with semaphore:
+            return await agenerate_document_insights(text)
+    
+    return await asyncio.gather(*(run(text) for text in texts))
+
+def generate_insights_many(texts, concurrency=None):
+    """Blocking entry point for agenerate_insights_many"""
+    return run_coroutine(agenerate_insights_many(texts, concurrency))
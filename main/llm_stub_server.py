@@ -0,0 +1,74 @@
+"""Local stand-in for the Mistral chat completions API, for load-testing the async insights path
+
+Run it, then point the app at it:
+
+    python main/llm_stub_server.py --port 8089 --latency 0.5 --rate-limit-probability 0.2
+    MISTRAL_ENDPOINT=http://localhost:8089 streamlit run app.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from aiohttp import web
+
+STUB_INSIGHTS = {
+    'summary': "Stub summary of the document.",
+    'key_points': ["First stub point", "Second stub point"],
+    'document_type': "Report"
+}
+
+def create_app(latency, jitter, rate_limit_probability, error_probability):
+    """Build an aiohttp app that answers chat completions with a fixed insights JSON"""
+    stats = {'requests': 0, 'rate_limited': 0, 'errors': 0}
+    
+    async def chat_completions(request):
+        stats['requests'] += 1
+        await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+        
+        roll = random.random()
+        if roll < rate_limit_probability:
+            stats['rate_limited'] += 1
+            return web.json_response({'message': "Requests rate limit exceeded"}, status=429)
+        if roll < rate_limit_probability + error_probability:
+            stats['errors'] += 1
+            return web.json_response({'message': "Internal server error"}, status=500)
+        
+        payload = await request.json()
+        return web.json_response({
+            'id': f"stub-{stats['requests']}",
+            'object': "chat.completion",
+            'created': int(time.time()),
+            'model': payload.get('model', "stub"),
+            'choices': [{
+                'index': 0,
+                'message': {'role': "assistant", 'content': json.dumps(STUB_INSIGHTS)},
+                'finish_reason': "stop"
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        })
+    
+    async def get_stats(request):
+        return web.json_response(stats)
+    
+    app = web.Application()
+    app.router.add_post('/v1/chat/completions', chat_completions)
+    app.router.add_get('/stats', get_stats)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Mistral API with latency and 429s")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.5, help="Mean response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Latency standard deviation in seconds")
+    parser.add_argument('--rate-limit-probability', type=float, default=0.1)
+    parser.add_argument('--error-probability', type=float, default=0.0)
+    args = parser.parse_args()
+    
+    web.run_app(
+        create_app(args.latency, args.jitter, args.rate_limit_probability, args.error_probability),
+        port=args.port
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import asyncio
+from config import Config
+from document_buffer import DocumentBuffer
+from summary_generator import parse_insights_response
+from llm_async import ainvoke_cached, run_coroutine
+
+def estimate_tokens(text):
+    """Rough token count from character length"""
+    return -(-len(text) // Config.LLM_CHARS_PER_TOKEN)
+
+def split_into_chunks(text, chunk_tokens):
+    """Pack paragraphs into chunks of at most chunk_tokens, hard-splitting oversized paragraphs"""
+    chunk_chars = chunk_tokens * Config.LLM_CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    current_length = 0
+    
+    for paragraph in DocumentBuffer(text).iter_paragraphs():
+        paragraph = paragraph.strip()
+        pieces = [paragraph[start:start + chunk_chars] for start in range(0, len(paragraph), chunk_chars)]
+        for piece in pieces:
+            if current and current_length + len(piece) + 2 > chunk_chars:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_length = 0
+            current.append(piece)
+            current_length += len(piece) + 2
+    
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def select_chunks(chunks, max_chunks):
+    """Keep at most max_chunks chunks spread evenly over the document, always keeping the first and last"""
+    if len(chunks) <= max_chunks:
+        return chunks
+    if max_chunks == 1:
+        return chunks[:1]
+    step = (len(chunks) - 1) / (max_chunks - 1)
+    return [chunks[round(index * step)] for index in range(max_chunks)]
+
+def build_chunk_summary_prompt(chunk, index, total, max_words):
+    """Prompt summarizing one chunk of a long document"""
+    return f"""
+    The following is part {index + 1} of {total} of a longer document.
+    Summarize this part in approximately {max_words} words, keeping concrete facts, figures, names and conclusions.
+    
+    Document part:
+    {chunk}
+    
+    Summary:
+    """
+
+def build_merge_summaries_prompt(summaries, max_words):
+    """Prompt merging consecutive section summaries into one"""
+    joined = "\n\n".join(f"Section {index + 1}:\n{summary}" for index, summary in enumerate(summaries))
+    return f"""
+    The following are summaries of consecutive sections of a document, in order.
+    Merge them into a single summary of approximately {max_words} words, keeping the most important facts and conclusions.
+    
+    Section summaries:
+    {joined}
+    
+    Summary:
+    """
+
+def build_final_insights_prompt(summaries, max_words, num_points):
+    """Prompt turning the reduced section summaries into summary, key points and document type"""
+    joined = "\n\n".join(f"Section {index + 1}:\n{summary}" for index, summary in enumerate(summaries))
+    return f"""
+    The following are summaries of consecutive sections of one document, in order.
+    Respond with a single JSON object describing the whole document, with exactly these keys:
+    "summary": a concise summary in approximately {max_words} words, focusing on the main points, key findings, and important information.
+    "key_points": a list of the {num_points} most important key points, each concise and informative.
+    "document_type": the document type in one or two words (e.g., Report, Research Paper, Manual, Letter, Article, etc.).
+    Respond with the JSON object only.
+    
+    Section summaries:
+    {joined}
+    
+    JSON:
+    """
+
+def group_summaries(summaries, max_tokens):
+    """Group consecutive summaries so each group fits max_tokens, with at least two per group"""
+    groups = []
+    current = []
+    current_tokens = 0
+    
+    for summary in summaries:
+        tokens = estimate_tokens(summary)
+        if len(current) >= 2 and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(summary)
+        current_tokens += tokens
+    
+    if len(current) == 1 and groups:
+        groups[-1].append(current[0])
+    elif current:
+        groups.append(current)
+    return groups
+
+async def asummarize_long_document(text, max_words=200, num_points=5, max_input_tokens=None, concurrency=None):
+    """Map-reduce insights for documents too long for a single prompt
+    
+    The text is packed into chunks that are summarized concurrently; chunk
+    summaries are then merged tier by tier until they fit one final prompt.
+    max_input_tokens caps how much of the document is sent (chunks are sampled
+    evenly beyond it) and concurrency caps in-flight LLM calls.
+    """
+    max_input_tokens = max_input_tokens or Config.LONG_DOC_MAX_INPUT_TOKENS
+    semaphore = asyncio.Semaphore(concurrency or Config.LONG_DOC_CONCURRENCY)
+    
+    chunks = split_into_chunks(text, Config.LONG_DOC_CHUNK_TOKENS)
+    chunks = select_chunks(chunks, max(1, max_input_tokens // Config.LONG_DOC_CHUNK_TOKENS))
+    
+    async def run(template, prompt):
+        async with semaphore:
+            try:
+                return (await ainvoke_cached(template, prompt)).strip() or None
+            except Exception as e:
+                print(f"Error in long document summarization: {e}")
+                return None
+    
+    summaries = await asyncio.gather(*(
+        run('chunk_summary', build_chunk_summary_prompt(chunk, index, len(chunks), Config.LONG_DOC_CHUNK_SUMMARY_WORDS))
+        for index, chunk in enumerate(chunks)
+    ))
+    summaries = [summary for summary in summaries if summary]
+    if not summaries:
+        return {
+            'summary': "Error generating summary: every chunk summary failed",
+            'key_points': [],
+            'document_type': "Unknown"
+        }
+    
+    # Each tier at least halves the number of summaries
+    while len(summaries) > 1 and sum(estimate_tokens(summary) for summary in summaries) > Config.LONG_DOC_REDUCE_TOKENS:
+        merged = await asyncio.gather(*(
+            run('merge_summaries', build_merge_summaries_prompt(group, Config.LONG_DOC_CHUNK_SUMMARY_WORDS * 2))
+            for group in group_summaries(summaries, Config.LONG_DOC_REDUCE_TOKENS)
+        ))
+        summaries = [summary for summary in merged if summary] or summaries[:1]
+    
+    try:
+        content = await ainvoke_cached(
+            'final_insights',
+            build_final_insights_prompt(summaries, max_words, num_points),
+            is_valid=lambda answer: parse_insights_response(answer, num_points) is not None
+        )
+    except Exception as e:
+        return {
+            'summary': f"Error generating summary: {str(e)}",
+            'key_points': [],
+            'document_type': "Unknown"
+        }
+    
+    return parse_insights_response(content, num_points) or {
+        'summary': content.strip(),
+        'key_points': [],
+        'document_type': "Unknown"
+    }
+
+def summarize_long_document(text, max_words=200, num_points=5, max_input_tokens=None, concurrency=None):
+    """Blocking entry point for asummarize_long_document"""
+    return run_coroutine(asummarize_long_document(text, max_words, num_points, max_input_tokens, concurrency))
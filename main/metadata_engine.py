@@ -0,0 +1,190 @@
+from config import Config
+from document_buffer import DocumentBuffer
+from metadata_generator import get_extraction_timestamp, format_file_size, calculate_reading_time
+from language_detector import analyze_language
+from text_analyzer import structure_from_stats
+from summary_generator import generate_document_insights
+from near_duplicate_index import minhash_signature, find_near_duplicates, remember_document, reusable_insights
+
+_FIELDS = {}
+EXPENSIVE_FIELDS = set()
+
+def metadata_field(name, depends_on=(), expensive=False):
+    """Register a metadata field computed from the fields it depends on"""
+    def register(func):
+        _FIELDS[name] = (tuple(depends_on), func)
+        if expensive:
+            EXPENSIVE_FIELDS.add(name)
+        return func
+    return register
+
+def available_fields(include_expensive=False):
+    """Public field names, cheap ones only unless include_expensive is set"""
+    return [name for name in _FIELDS
+            if not name.startswith('_') and (include_expensive or name not in EXPENSIVE_FIELDS)]
+
+class MetadataEngine:
+    """Computes metadata fields on demand, memoizing each one
+    
+    Each field declares its dependencies, so asking for {"word_count"} never
+    runs language detection or any LLM call. Fields marked expensive are only
+    computed when requested by name or with include_expensive=True.
+    file_name overrides file.name, e.g. for uploads saved under a temp name.
+    """
+    
+    def __init__(self, file, document, file_type, file_name=None):
+        self.file = file
+        self.file_name = file_name or file.name
+        self.file_type = file_type
+        self.document = document if isinstance(document, DocumentBuffer) else DocumentBuffer(document)
+        self._values = {}
+    
+    def get(self, name):
+        """Compute (or return the memoized) value of a single field"""
+        if name in self._values:
+            return self._values[name]
+        if name not in _FIELDS:
+            raise KeyError(f"Unknown metadata field: {name}")
+        
+        depends_on, func = _FIELDS[name]
+        value = func(self, *[self.get(dependency) for dependency in depends_on])
+        self._values[name] = value
+        return value
+    
+    def compute(self, fields=None, include_expensive=False):
+        """Compute a set of fields, returning them in request order"""
+        if fields is None:
+            fields = available_fields(include_expensive)
+        return {name: self.get(name) for name in fields}
+    
+    def is_computed(self, name):
+        return name in self._values
+
+# File fields
+
+@metadata_field('file_name')
+def _file_name(engine):
+    return engine.file_name
+
+@metadata_field('extracted_on')
+def _extracted_on(engine):
+    return get_extraction_timestamp()
+
+@metadata_field('file_type')
+def _file_type(engine):
+    return engine.file_type.upper()
+
+@metadata_field('file_size')
+def _file_size(engine):
+    return format_file_size(getattr(engine.file, 'size', 0))
+
+# Text statistics
+
+@metadata_field('_stats')
+def _stats(engine):
+    return engine.document.stats
+
+@metadata_field('document_length', depends_on=('_stats',))
+def _document_length(engine, stats):
+    return f"{stats.character_count:,} characters"
+
+@metadata_field('word_count', depends_on=('_stats',))
+def _word_count(engine, stats):
+    return f"{stats.word_count:,} words"
+
+@metadata_field('approx_reading_time', depends_on=('_stats',))
+def _reading_time(engine, stats):
+    return calculate_reading_time(engine.document.text, Config.DEFAULT_READING_SPEED_WPM, word_count=stats.word_count)
+
+@metadata_field('paragraphs', depends_on=('_stats',))
+def _paragraphs(engine, stats):
+    return f"{stats.paragraph_count} paragraphs"
+
+@metadata_field('_structure', depends_on=('_stats',))
+def _structure(engine, stats):
+    return structure_from_stats(stats)
+
+@metadata_field('sentence_count', depends_on=('_structure',))
+def _sentence_count(engine, structure):
+    return structure['sentence_count']
+
+@metadata_field('line_count', depends_on=('_structure',))
+def _line_count(engine, structure):
+    return structure['line_count']
+
+@metadata_field('readability', depends_on=('_structure',))
+def _readability(engine, structure):
+    return structure['complexity']['readability']
+
+@metadata_field('avg_word_length', depends_on=('_structure',))
+def _avg_word_length(engine, structure):
+    return structure['complexity']['avg_word_length']
+
+@metadata_field('avg_sentence_length', depends_on=('_structure',))
+def _avg_sentence_length(engine, structure):
+    return structure['complexity']['avg_sentence_length']
+
+@metadata_field('top_words', depends_on=('_structure',))
+def _top_words(engine, structure):
+    return structure['top_words']
+
+# Language
+
+@metadata_field('_language')
+def _language(engine):
+    return analyze_language(engine.document.text)
+
+@metadata_field('detected_language', depends_on=('_language',))
+def _detected_language(engine, language):
+    return language['detected_language']
+
+@metadata_field('language_confidence', depends_on=('_language',))
+def _language_confidence(engine, language):
+    return language['confidence']
+
+# Near duplicates of previously analyzed documents
+
+@metadata_field('_signature')
+def _signature(engine):
+    return minhash_signature(engine.document.text) if Config.NEAR_DUP_ENABLED else None
+
+@metadata_field('_near_duplicates', depends_on=('_signature',))
+def _near_duplicates(engine, signature):
+    return find_near_duplicates(engine.document.text, signature=signature) if signature is not None else []
+
+@metadata_field('near_duplicates', depends_on=('_near_duplicates',))
+def _near_duplicates_public(engine, matches):
+    return [{'file_name': match['name'], 'similarity': match['similarity']} for match in matches]
+
+# AI insights (LLM calls, skipped when a near duplicate already has them)
+
+@metadata_field('_insights', depends_on=('_signature', '_near_duplicates'), expensive=True)
+def _insights(engine, signature, matches):
+    if Config.NEAR_DUP_REUSE_INSIGHTS:
+        insights = reusable_insights(matches)
+        if insights:
+            return insights
+    
+    insights = generate_document_insights(engine.document.text)
+    remember_document(engine.document.text, engine.file_name, insights, signature=signature)
+    return insights
+
+@metadata_field('insights_reused_from', depends_on=('_insights',), expensive=True)
+def _insights_reused_from(engine, insights):
+    return insights.get('reused_from')
+
+@metadata_field('summary', depends_on=('_insights',), expensive=True)
+def _summary(engine, insights):
+    return insights['summary']
+
+@metadata_field('key_points', depends_on=('_insights',), expensive=True)
+def _key_points(engine, insights):
+    return insights['key_points']
+
+@metadata_field('document_type', depends_on=('_insights',), expensive=True)
+def _document_type(engine, insights):
+    return insights['document_type']
+
+def generate_metadata(file, document, file_type, fields=None, include_expensive=False):
+    """Compute only the requested metadata fields for a document"""
+    return MetadataEngine(file, document, file_type).compute(fields, include_expensive)
@@ -1,5 +1,6 @@
 from datetime import datetime
 import re
+from text_analyzer import compute_text_stats
 
 def get_extraction_timestamp():
     """Get current timestamp for extraction"""
@@ -22,12 +23,13 @@ def count_paragraphs(text):
     paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
     return len(paragraphs)
 
-def calculate_reading_time(text, wpm=200):
+def calculate_reading_time(text, wpm=200, word_count=None):
     """Calculate approximate reading time in minutes"""
     if not text:
         return "0 min"
     
-    word_count = count_words(text)
+    if word_count is None:
+        word_count = count_words(text)
     minutes = word_count / wpm
     
     if minutes < 1:
@@ -50,19 +52,20 @@ def format_file_size(size_bytes):
         size_bytes /= 1024.0
     return f"{size_bytes:.1f} TB"
 
-def generate_basic_metadata(file, text, file_type):
+def generate_basic_metadata(file, text, file_type, stats=None):
     """Generate comprehensive metadata for document"""
     file_size = getattr(file, 'size', 0)
+    stats = stats or compute_text_stats(text)
     
     metadata = {
         'file_name': file.name,
         'extracted_on': get_extraction_timestamp(),
         'file_type': file_type.upper(),
         'file_size': format_file_size(file_size),
-        'document_length': f"{calculate_document_length(text):,} characters",
-        'word_count': f"{count_words(text):,} words",
-        'approx_reading_time': calculate_reading_time(text),
-        'paragraphs': f"{count_paragraphs(text)} paragraphs"
+        'document_length': f"{stats.character_count:,} characters",
+        'word_count': f"{stats.word_count:,} words",
+        'approx_reading_time': calculate_reading_time(text, word_count=stats.word_count),
+        'paragraphs': f"{stats.paragraph_count} paragraphs"
     }
     
     return metadata
@@ -0,0 +1,294 @@
+import difflib
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+import numpy as np
+from config import Config
+from cache_store import connect_sqlite
+
+# Largest prime below 2**32: permuted hashes fit in uint32, and a * h + b fits in uint64
+_PRIME = np.uint64(4294967291)
+_BLOCK_SHINGLES = 4096
+
+# Letters and digits of any script; Han and kana are written without spaces, so each character is a token
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+")
+
+_index = None
+_index_lock = threading.Lock()
+
+def shingle_hashes(text, shingle_words=None):
+    """Distinct 32-bit hashes of the word shingles of a text (lowercased, punctuation dropped)"""
+    shingle_words = shingle_words or Config.NEAR_DUP_SHINGLE_WORDS
+    words = _TOKEN_RE.findall(text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    
+    word_hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words))
+    shingles = word_hashes
+    for offset in range(1, min(shingle_words, len(words))):
+        shingles = shingles[:-1] * np.uint64(1000003) ^ word_hashes[offset:]
+    return np.unique(shingles & np.uint64(0xFFFFFFFF))
+
+def _permutations(num_perm, seed):
+    generator = np.random.RandomState(seed)
+    a = generator.randint(1, int(_PRIME), size=num_perm, dtype=np.int64).astype(np.uint64)
+    b = generator.randint(0, int(_PRIME), size=num_perm, dtype=np.int64).astype(np.uint64)
+    return a, b
+
+def minhash_signature(text, num_perm=None, seed=0):
+    """MinHash signature of a text's shingles as a uint32 array"""
+    num_perm = num_perm or Config.NEAR_DUP_NUM_PERM
+    a, b = _permutations(num_perm, seed)
+    hashes = shingle_hashes(text)
+    
+    signature = np.full(num_perm, _PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), _BLOCK_SHINGLES):
+        block = hashes[start:start + _BLOCK_SHINGLES, None]
+        np.minimum(signature, ((block * a + b) % _PRIME).min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+def is_empty_signature(signature):
+    """True for the signature of a text without shingles, which would match every other such text"""
+    return bool(np.all(signature == np.uint32(_PRIME)))
+
+def estimate_jaccard(signature, other):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return float(np.mean(signature == other))
+
+def diff_texts(old_text, new_text, max_lines=200):
+    """Unified line diff between a prior document and a new one, truncated to max_lines"""
+    diff = difflib.unified_diff(
+        old_text.splitlines(), new_text.splitlines(),
+        fromfile="previous", tofile="current", lineterm="", n=1
+    )
+    lines = []
+    for line in diff:
+        if len(lines) >= max_lines:
+            lines.append("...")
+            break
+        lines.append(line)
+    return lines
+
+class NearDuplicateIndex:
+    """Persistent MinHash LSH index in SQLite
+    
+    Signatures are split into bands; documents sharing any band bucket are
+    candidates, so a query reads a handful of index rows instead of scanning
+    every stored signature. Each document keeps its insights (and optionally
+    its compressed text) so later revisions can reuse or diff them. Documents
+    older than ttl_seconds are dropped, and the oldest ones go first once the
+    stored rows exceed max_bytes.
+    """
+    
+    def __init__(self, path, num_perm=None, bands=None, max_bytes=None, ttl_seconds=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.num_perm = num_perm or Config.NEAR_DUP_NUM_PERM
+        self.bands = bands or Config.NEAR_DUP_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.rows = self.num_perm // self.bands
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "doc_id INTEGER PRIMARY KEY, content_key TEXT UNIQUE NOT NULL, name TEXT, "
+            "signature BLOB NOT NULL, text BLOB, insights TEXT, created_at REAL NOT NULL, "
+            "size INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(documents)")]
+        if 'size' not in columns:
+            # Indexes written before eviction existed: their rows count from their stored lengths
+            self._conn.execute("ALTER TABLE documents ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "UPDATE documents SET size = length(signature) + COALESCE(length(text), 0) + COALESCE(length(insights), 0)"
+            )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_created_at ON documents (created_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lsh_buckets ("
+            "band INTEGER NOT NULL, bucket INTEGER NOT NULL, doc_id INTEGER NOT NULL, "
+            "PRIMARY KEY (band, bucket, doc_id)) WITHOUT ROWID"
+        )
+    
+    def _buckets(self, signature):
+        """(band, bucket) pairs for a signature"""
+        return [
+            (band, int.from_bytes(
+                hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).digest(),
+                'big', signed=True
+            ))
+            for band in range(self.bands)
+        ]
+    
+    def add(self, text, name=None, insights=None, signature=None):
+        """Index a document (or refresh the insights of an identical one) and return its id
+        
+        Texts without shingles are not indexed and return None.
+        """
+        signature = minhash_signature(text, self.num_perm) if signature is None else signature
+        if is_empty_signature(signature):
+            return None
+        content_key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        stored_text = zlib.compress(text.encode('utf-8'), Config.CACHE_COMPRESSION_LEVEL) if Config.NEAR_DUP_STORE_TEXT else None
+        insights_json = json.dumps(insights, ensure_ascii=False) if insights is not None else None
+        stored_signature = signature.astype(np.uint32).tobytes()
+        now = time.time()
+        
+        with self._lock:
+            row = self._conn.execute("SELECT doc_id, insights FROM documents WHERE content_key = ?", (content_key,)).fetchone()
+            if row:
+                # Seen again: keep it as long as a new document
+                insights_json = row[1] if insights_json is None else insights_json
+                self._conn.execute(
+                    "UPDATE documents SET insights = ?, created_at = ?, "
+                    "size = length(signature) + COALESCE(length(text), 0) + ? WHERE doc_id = ?",
+                    (insights_json, now, len(insights_json or ""), row[0])
+                )
+                return row[0]
+            
+            size = len(stored_signature) + len(stored_text or b"") + len(insights_json or "")
+            self._conn.execute("BEGIN")
+            try:
+                doc_id = self._conn.execute(
+                    "INSERT INTO documents (content_key, name, signature, text, insights, created_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (content_key, name, stored_signature, stored_text, insights_json, now, size)
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO lsh_buckets (band, bucket, doc_id) VALUES (?, ?, ?)",
+                    [(band, bucket, doc_id) for band, bucket in self._buckets(signature)]
+                )
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return doc_id
+    
+    def _delete(self, rows):
+        """Delete (doc_id, signature) rows with their bucket entries (call with the lock held)"""
+        # Bucket rows are keyed by (band, bucket), so they are found again from the stored signature
+        self._conn.executemany(
+            "DELETE FROM lsh_buckets WHERE band = ? AND bucket = ? AND doc_id = ?",
+            [(band, bucket, doc_id) for doc_id, stored in rows
+             for band, bucket in self._buckets(np.frombuffer(stored, dtype=np.uint32))]
+        )
+        self._conn.executemany("DELETE FROM documents WHERE doc_id = ?", [(doc_id,) for doc_id, _ in rows])
+    
+    def _evict(self, now):
+        """Delete expired documents, then the oldest ones until the index fits in max_bytes (call with the lock held)"""
+        if self.ttl_seconds:
+            self._delete(self._conn.execute(
+                "SELECT doc_id, signature FROM documents WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).fetchall())
+        
+        if not self.max_bytes:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        expired = []
+        for doc_id, stored, size in self._conn.execute("SELECT doc_id, signature, size FROM documents ORDER BY created_at"):
+            if total <= self.max_bytes:
+                break
+            expired.append((doc_id, stored))
+            total -= size
+        self._delete(expired)
+    
+    def query(self, text=None, threshold=None, limit=5, signature=None, max_candidates=1000):
+        """Indexed documents whose estimated Jaccard similarity is at least threshold, most similar first"""
+        threshold = Config.NEAR_DUP_THRESHOLD if threshold is None else threshold
+        signature = minhash_signature(text, self.num_perm) if signature is None else signature
+        if is_empty_signature(signature):
+            return []
+        buckets = self._buckets(signature)
+        
+        with self._lock:
+            # Documents sharing the most bands are the likeliest matches, so they survive the limit
+            candidates = [row[0] for row in self._conn.execute(
+                "SELECT doc_id FROM lsh_buckets WHERE (band, bucket) IN (VALUES "
+                + ", ".join("(?, ?)" for _ in buckets) + ") "
+                + f"GROUP BY doc_id ORDER BY COUNT(*) DESC LIMIT {int(max_candidates)}",
+                [value for pair in buckets for value in pair]
+            )]
+            if not candidates:
+                return []
+            rows = self._conn.execute(
+                "SELECT doc_id, name, signature, insights, created_at FROM documents WHERE doc_id IN ("
+                + ", ".join("?" for _ in candidates) + ")",
+                candidates
+            ).fetchall()
+        
+        matches = []
+        for doc_id, name, stored, insights, created_at in rows:
+            similarity = estimate_jaccard(signature, np.frombuffer(stored, dtype=np.uint32))
+            if similarity >= threshold:
+                matches.append({
+                    'doc_id': doc_id,
+                    'name': name,
+                    'similarity': round(similarity, 3),
+                    'insights': json.loads(insights) if insights else None,
+                    'created_at': created_at
+                })
+        matches.sort(key=lambda match: match['similarity'], reverse=True)
+        return matches[:limit]
+    
+    def get_text(self, doc_id):
+        """Stored text of an indexed document, or None if texts are not kept"""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row and row[0] else None
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+def get_near_duplicate_index():
+    """Get the process-wide near-duplicate index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex(
+                Config.NEAR_DUP_INDEX_PATH,
+                max_bytes=Config.NEAR_DUP_MAX_MB * 1024 * 1024,
+                ttl_seconds=Config.NEAR_DUP_TTL_SECONDS
+            )
+    return _index
+
+def find_near_duplicates(text, signature=None, threshold=None, limit=5):
+    """Previously analyzed documents similar to text, or [] when disabled or on error"""
+    if not Config.NEAR_DUP_ENABLED or not text:
+        return []
+    try:
+        return get_near_duplicate_index().query(text, threshold, limit, signature=signature)
+    except Exception as e:
+        print(f"Error querying near-duplicate index: {e}")
+        return []
+
+def remember_document(text, name=None, insights=None, signature=None):
+    """Index an analyzed document so later revisions can find it"""
+    if not Config.NEAR_DUP_ENABLED or not text:
+        return None
+    # Failed LLM answers come back as error strings; never hand those to later revisions
+    if insights and str(insights.get('summary', '')).startswith("Error"):
+        insights = None
+    try:
+        return get_near_duplicate_index().add(text, name, insights, signature=signature)
+    except Exception as e:
+        print(f"Error updating near-duplicate index: {e}")
+        return None
+
+def reusable_insights(matches):
+    """Insights of the most similar prior document that has them, tagged with where they came from"""
+    for match in matches:
+        if match['insights']:
+            return {**match['insights'], 'reused_from': match['name'], 'similarity': match['similarity']}
+    return None
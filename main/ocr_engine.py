@@ -0,0 +1,128 @@
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import pytesseract
+from PIL import Image, ImageSequence
+from config import Config
+
+@lru_cache(maxsize=1)
+def tesseract_available():
+    """Whether the tesseract binary pytesseract calls can be found"""
+    return shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+
+def prepare_image(image, target_dpi=None, binarize=None):
+    """Convert to grayscale, downscale oversized scans to target DPI and optionally binarize"""
+    target_dpi = target_dpi or Config.OCR_DPI
+    if binarize is None:
+        binarize = Config.OCR_BINARIZE
+    
+    source_dpi = image.info.get('dpi', (0, 0))[0] or 0
+    prepared = image.convert('L')
+    
+    if source_dpi > target_dpi:
+        scale = target_dpi / source_dpi
+        size = (max(1, int(prepared.width * scale)), max(1, int(prepared.height * scale)))
+        prepared = prepared.resize(size, Image.LANCZOS)
+    
+    if binarize:
+        threshold = Config.OCR_BINARIZE_THRESHOLD
+        prepared = prepared.point(lambda value: 255 if value >= threshold else 0)
+    
+    return prepared
+
+def split_tiles(image, tile_height=None, overlap=None):
+    """Split a tall page into overlapping horizontal bands"""
+    tile_height = tile_height or Config.OCR_TILE_HEIGHT
+    overlap = Config.OCR_TILE_OVERLAP if overlap is None else overlap
+    
+    if image.height <= tile_height:
+        return [image]
+    
+    tiles = []
+    step = max(1, tile_height - overlap)
+    for top in range(0, image.height, step):
+        bottom = min(top + tile_height, image.height)
+        tiles.append(image.crop((0, top, image.width, bottom)))
+        if bottom == image.height:
+            break
+    return tiles
+
+def _overlap_length(previous_lines, tile_lines, max_lines=5):
+    """Count leading lines of a tile that repeat the end of the previous tile"""
+    for length in range(min(max_lines, len(previous_lines), len(tile_lines)), 0, -1):
+        if [line.strip() for line in previous_lines[-length:]] == [line.strip() for line in tile_lines[:length]]:
+            return length
+    return 0
+
+def merge_tile_texts(texts):
+    """Merge OCR text of overlapping bands, dropping lines repeated in the overlap"""
+    lines = []
+    for text in texts:
+        tile_lines = text.strip('\n').splitlines()
+        while lines and not lines[-1].strip():
+            lines.pop()
+        lines.extend(tile_lines[_overlap_length(lines, tile_lines):])
+    return "\n".join(lines)
+
+def _recognize(image, lang=None):
+    """Run tesseract on one image, returning text and elapsed seconds"""
+    started = time.perf_counter()
+    text = pytesseract.image_to_string(image, lang=lang) if lang else pytesseract.image_to_string(image)
+    return text, time.perf_counter() - started
+
+def recognize_image(image, target_dpi=None, binarize=None, lang=None):
+    """OCR a single image in the current thread, tiling it if it is very large"""
+    prepared = prepare_image(image, target_dpi, binarize)
+    return merge_tile_texts([_recognize(tile, lang)[0] for tile in split_tiles(prepared)])
+
+def _collect_frame(frame):
+    """Wait for a frame's tiles and build its text and timing report"""
+    results = [future.result() for future in frame.pop('futures')]
+    frame['text'] = merge_tile_texts([text for text, _ in results])
+    frame['ocr_seconds'] = round(sum(seconds for _, seconds in results), 3)
+    return frame
+
+def ocr_image(file, target_dpi=None, binarize=None, max_workers=None, lang=None):
+    """OCR every frame of an image file across a worker pool
+    
+    Returns a dict with the merged 'text' and a per-frame timing report under
+    'frames' so DPI and tiling can be tuned against throughput.
+    """
+    workers = max_workers or Config.OCR_MAX_WORKERS
+    started = time.perf_counter()
+    image = Image.open(file)
+    frames = []
+    pending = deque()
+    
+    # tesseract runs as a subprocess, so threads are enough to keep every core busy
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, source in enumerate(ImageSequence.Iterator(image)):
+            prepare_started = time.perf_counter()
+            prepared = prepare_image(source, target_dpi, binarize)
+            tiles = split_tiles(prepared)
+            
+            pending.append({
+                'frame': index + 1,
+                'width': prepared.width,
+                'height': prepared.height,
+                'source_dpi': source.info.get('dpi', (0, 0))[0] or None,
+                'tiles': len(tiles),
+                'prepare_seconds': round(time.perf_counter() - prepare_started, 3),
+                'futures': [pool.submit(_recognize, tile, lang) for tile in tiles]
+            })
+            
+            # Bound the number of prepared frames held in memory
+            while len(pending) > workers * 2:
+                frames.append(_collect_frame(pending.popleft()))
+        
+        while pending:
+            frames.append(_collect_frame(pending.popleft()))
+    
+    texts = [frame.pop('text') for frame in frames]
+    return {
+        'text': "\n\n".join(text for text in texts if text.strip()),
+        'frames': frames,
+        'total_seconds': round(time.perf_counter() - started, 3)
+    }
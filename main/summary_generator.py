@@ -1,29 +1,68 @@
-from langchain_mistralai import ChatMistralAI
+import hashlib
+import json
+import re
 from config import Config
+from cache_store import CompressedCache
+from extractive_selector import select_key_sentences
+from doc_type_classifier import classify_locally, log_document_type_label
 
-def initialize_mistral():
-    """Initialize Mistral AI client"""
-    try:
-        return ChatMistralAI(
-            mistral_api_key=Config.MISTRAL_API_KEY,
-            model=Config.MISTRAL_MODEL,
-            temperature=0.3
+# Bump a template's version whenever its prompt wording changes so cached answers are not reused
+PROMPT_TEMPLATE_VERSIONS = {
+    'summary': 1,
+    'key_points': 1,
+    'document_type': 1,
+    'insights': 1,
+    'chunk_summary': 1,
+    'merge_summaries': 1,
+    'final_insights': 1
+}
+
+_llm_cache = None
+
+def get_llm_cache():
+    """Get the process-wide LLM response cache"""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = CompressedCache(
+            Config.LLM_CACHE_PATH,
+            max_bytes=Config.LLM_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=Config.LLM_CACHE_TTL_SECONDS
         )
-    except Exception as e:
-        print(f"Error initializing Mistral: {e}")
-        return None
+    return _llm_cache
+
+def prompt_text_sample(text, max_chars):
+    """Text to send to the LLM: key sentences from the whole document, or its beginning"""
+    if Config.EXTRACTIVE_SELECTION:
+        return select_key_sentences(text, max_chars)
+    return text[:max_chars]
+
+def llm_cache_key(template, prompt):
+    """Fingerprint of model, temperature, prompt template version and the filled-in prompt"""
+    fingerprint = json.dumps({
+        'model': Config.MISTRAL_MODEL,
+        'temperature': Config.MISTRAL_TEMPERATURE,
+        'template': template,
+        'version': PROMPT_TEMPLATE_VERSIONS[template],
+        'prompt': prompt
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+def invoke_cached(template, prompt, is_valid=None):
+    """Invoke the LLM from blocking code, answering from the response cache when the same prompt was seen before
+    
+    Calls run on the shared event loop, so they go through the same rate
+    limiter, retry budget and client as the async paths.
+    """
+    # Imported here: llm_async builds on this module
+    from llm_async import ainvoke_cached, run_coroutine
+    return run_coroutine(ainvoke_cached(template, prompt, is_valid))
 
 def generate_summary(text, max_words=200):
     """Generate document summary using Mistral AI"""
     if not text or len(text.strip()) < Config.MIN_TEXT_FOR_SUMMARY:
         return "Text too short for summary generation"
     
-    mistral = initialize_mistral()
-    if not mistral:
-        return "Error: Could not initialize Mistral AI"
-    
-    # Truncate text if too long (keep first 3000 chars for efficiency)
-    text_sample = text[:3000] if len(text) > 3000 else text
+    text_sample = prompt_text_sample(text, Config.PROMPT_SAMPLE_CHARS)
     
     prompt = f"""
     Please provide a concise summary of the following document in approximately {max_words} words. 
@@ -36,8 +75,7 @@ def generate_summary(text, max_words=200):
     """
     
     try:
-        response = mistral.invoke(prompt)
-        return response.content.strip()
+        return invoke_cached('summary', prompt).strip()
     except Exception as e:
         return f"Error generating summary: {str(e)}"
 
@@ -46,11 +84,7 @@ def extract_key_points(text, num_points=5):
     if not text or len(text.strip()) < Config.MIN_TEXT_FOR_SUMMARY:
         return []
     
-    mistral = initialize_mistral()
-    if not mistral:
-        return ["Error: Could not initialize Mistral AI"]
-    
-    text_sample = text[:3000] if len(text) > 3000 else text
+    text_sample = prompt_text_sample(text, Config.PROMPT_SAMPLE_CHARS)
     
     prompt = f"""
     Extract the {num_points} most important key points from this document. 
@@ -63,12 +97,81 @@ def extract_key_points(text, num_points=5):
     """
     
     try:
-        response = mistral.invoke(prompt)
-        points = response.content.strip().split('\n')
+        points = invoke_cached('key_points', prompt).strip().split('\n')
         return [point.strip() for point in points if point.strip()][:num_points]
     except Exception as e:
         return [f"Error extracting key points: {str(e)}"]
 
+def build_insights_prompt(text_sample, max_words=200, num_points=5):
+    """Prompt asking for summary, key points and document type as one JSON object"""
+    return f"""
+    Analyze the following document and respond with a single JSON object with exactly these keys:
+    "summary": a concise summary in approximately {max_words} words, focusing on the main points, key findings, and important information.
+    "key_points": a list of the {num_points} most important key points, each concise and informative.
+    "document_type": the document type in one or two words (e.g., Report, Research Paper, Manual, Letter, Article, etc.).
+    Respond with the JSON object only.
+    
+    Document text:
+    {text_sample}
+    
+    JSON:
+    """
+
+def parse_insights_response(content, num_points=5):
+    """Parse the JSON insights answer, returning None if it is not usable"""
+    content = re.sub(r'^```(?:json)?|```$', '', content.strip(), flags=re.MULTILINE).strip()
+    start, end = content.find('{'), content.rfind('}')
+    if start < 0 or end < start:
+        return None
+    
+    try:
+        data = json.loads(content[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    
+    if not isinstance(data, dict) or not data.get('summary'):
+        return None
+    
+    key_points = data.get('key_points') or []
+    if isinstance(key_points, str):
+        key_points = key_points.split('\n')
+    
+    return {
+        'summary': str(data['summary']).strip(),
+        'key_points': [str(point).strip() for point in key_points if str(point).strip()][:num_points],
+        'document_type': str(data.get('document_type') or "Unknown").strip()
+    }
+
+def generate_combined_insights(text, max_words=200, num_points=5):
+    """Generate summary, key points and document type with a single LLM call
+    
+    Returns None when the call fails or the answer is not valid JSON, so the
+    caller can fall back to separate calls.
+    """
+    text_sample = prompt_text_sample(text, Config.PROMPT_SAMPLE_CHARS)
+    
+    try:
+        content = invoke_cached(
+            'insights',
+            build_insights_prompt(text_sample, max_words, num_points),
+            is_valid=lambda answer: parse_insights_response(answer, num_points) is not None
+        )
+        return parse_insights_response(content, num_points)
+    except Exception as e:
+        print(f"Error generating combined insights: {e}")
+        return None
+
+def finish_insights(text, insights):
+    """Post-process LLM insights: a confident local document type wins, otherwise the LLM's type is logged as a label"""
+    text_sample = prompt_text_sample(text, Config.DOCUMENT_TYPE_SAMPLE_CHARS)
+    
+    doc_type = classify_locally(text_sample)
+    if doc_type:
+        insights['document_type'] = doc_type
+    else:
+        log_document_type_label(text_sample, insights['document_type'])
+    return insights
+
 def generate_document_insights(text):
     """Generate comprehensive document insights"""
     if not text or len(text.strip()) < Config.MIN_TEXT_FOR_SUMMARY:
@@ -78,6 +181,16 @@ def generate_document_insights(text):
             'document_type': "Unknown"
         }
     
+    if Config.LONG_DOC_MODE and len(text) > Config.LONG_DOC_THRESHOLD_CHARS:
+        # Imported here: long_summarizer builds on llm_async, which imports this module
+        from long_summarizer import summarize_long_document
+        return finish_insights(text, summarize_long_document(text))
+    
+    if Config.COMBINED_INSIGHTS:
+        insights = generate_combined_insights(text)
+        if insights:
+            return finish_insights(text, insights)
+    
     summary = generate_summary(text)
     key_points = extract_key_points(text)
     doc_type = classify_document_type(text)
@@ -88,17 +201,8 @@ def generate_document_insights(text):
         'document_type': doc_type
     }
 
-def classify_document_type(text):
-    """Classify document type based on content"""
-    if not text:
-        return "Unknown"
-    
-    mistral = initialize_mistral()
-    if not mistral:
-        return "Unknown"
-    
-    text_sample = text[:1000]
-    
+def classify_document_type_llm(text_sample):
+    """Classify document type with the LLM"""
     prompt = f"""
     Classify this document type in one or two words (e.g., Report, Research Paper, Manual, Letter, Article, etc.):
     
@@ -108,7 +212,25 @@ def classify_document_type(text):
     """
     
     try:
-        response = mistral.invoke(prompt)
-        return response.content.strip()
+        return invoke_cached('document_type', prompt).strip()
     except Exception as e:
-        return "Unknown"
\ No newline at end of file
+        return "Unknown"
+
+def classify_document_type(text):
+    """Classify document type based on content, asking the LLM only when the local model is unsure"""
+    if not text:
+        return "Unknown"
+    
+    text_sample = prompt_text_sample(text, Config.DOCUMENT_TYPE_SAMPLE_CHARS)
+    
+    doc_type = classify_locally(text_sample)
+    if doc_type:
+        return doc_type
+    
+    doc_type = classify_document_type_llm(text_sample)
+    log_document_type_label(text_sample, doc_type)
+    return doc_type
+
+def llm_cache_stats():
+    """Hit/miss counters and size of the LLM response cache"""
+    return get_llm_cache().stats()
\ No newline at end of file
@@ -1,6 +1,278 @@
 import re
 import string
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+# Simple stop words
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
+              'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 
+              'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+              'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'}
+
+_WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
+# One match per non-blank run between sentence delimiters, same as re.split(r'[.!?]+') + strip()
+_SENTENCE_RE = re.compile(r'\s*[^\s.!?][^.!?]*')
+_SENTENCE_DELIMITER_RE = re.compile(r'[.!?]')
+_NON_SPACE_RE = re.compile(r'\S')
+_NEWLINES_RE = re.compile(r'\n*')
+
+@dataclass
+class TextStats:
+    """Document counts gathered in one scan and shared by every analyzer"""
+    word_count: int = 0
+    sentence_count: int = 0
+    paragraph_count: int = 0
+    line_count: int = 0
+    character_count: int = 0
+    character_count_no_spaces: int = 0
+    word_length_total: int = 0
+    term_counts: Counter = field(default_factory=Counter)
+
+@dataclass
+class _Segments:
+    """Non-blank segment count of a chunk split on a separator, plus the state of its edge segments"""
+    count: int = 0
+    has_separator: bool = False
+    lead_nonblank: bool = False
+    trail_nonblank: bool = False
+
+def _chunk_segments(text, count, first_separator, last_separator_end):
+    """Build segment state for a chunk from separator positions (-1 when there is none)"""
+    if first_separator < 0:
+        nonblank = _NON_SPACE_RE.search(text) is not None
+        return _Segments(count, False, nonblank, nonblank)
+    
+    return _Segments(
+        count,
+        True,
+        _NON_SPACE_RE.search(text, 0, first_separator) is not None,
+        _NON_SPACE_RE.search(text, last_separator_end) is not None
+    )
+
+def _merge_segments(left, right, join=True):
+    """Merge segment state of adjacent chunks, joining the segments that meet at the boundary"""
+    if not join:
+        return _Segments(left.count + right.count, True, left.lead_nonblank, right.trail_nonblank)
+    
+    joined = left.trail_nonblank or right.lead_nonblank
+    return _Segments(
+        left.count - left.trail_nonblank + right.count - right.lead_nonblank + joined,
+        left.has_separator or right.has_separator,
+        left.lead_nonblank if left.has_separator else joined,
+        right.trail_nonblank if right.has_separator else joined
+    )
+
+def _edge_newlines(text, at_end):
+    """Count newlines at one edge of a chunk, capped at two (enough to tell a paragraph break)"""
+    if at_end:
+        return 2 if text.endswith('\n\n') else 1 if text.endswith('\n') else 0
+    return 2 if text.startswith('\n\n') else 1 if text.startswith('\n') else 0
+
+@dataclass
+class PartialTextStats:
+    """Statistics of one chunk of a document that merge associatively with adjacent chunks
+    
+    Words, sentences, lines and paragraphs that straddle a chunk boundary are
+    kept open at the edges and joined on merge, so merging the partials of
+    consecutive chunks gives exactly the stats of the concatenated text.
+    """
+    character_count: int = 0
+    space_count: int = 0
+    word_length_total: int = 0
+    has_space: bool = False
+    lead_token: str = ""
+    trail_token: str = ""
+    interior_words: int = 0
+    interior_terms: Counter = field(default_factory=Counter)
+    sentences: _Segments = field(default_factory=_Segments)
+    lines: _Segments = field(default_factory=_Segments)
+    paragraphs: _Segments = field(default_factory=_Segments)
+    lead_newlines: int = 0
+    trail_newlines: int = 0
+    all_newlines: bool = True
+    
+    @classmethod
+    def from_text(cls, text):
+        """Compute partial stats for a chunk of text"""
+        if not text:
+            return cls()
+        
+        tokens = text.split()
+        if len(tokens) == 1 and len(tokens[0]) == len(text):
+            has_space, lead_token, trail_token, interior = False, text, text, []
+        else:
+            has_space = True
+            lead_token = tokens[0] if tokens and not text[0].isspace() else ""
+            trail_token = tokens[-1] if tokens and not text[-1].isspace() else ""
+            interior = tokens[1 if lead_token else 0:len(tokens) - 1 if trail_token else len(tokens)]
+        interior_terms = Counter(interior)
+        word_length_total = sum(map(len, tokens))
+        del tokens, interior
+        
+        # Non-blank lines, and paragraphs as groups of lines separated by a "\n\n" break
+        line_count = 0
+        paragraph_count = 0
+        in_paragraph = False
+        for line in text.split('\n'):
+            if not line:
+                in_paragraph = False
+            elif not line.isspace():
+                line_count += 1
+                if not in_paragraph:
+                    paragraph_count += 1
+                    in_paragraph = True
+        
+        first_delimiter = _SENTENCE_DELIMITER_RE.search(text)
+        last_delimiter = max(text.rfind('.'), text.rfind('!'), text.rfind('?'))
+        last_break = text.rfind('\n\n')
+        
+        return cls(
+            character_count=len(text),
+            space_count=text.count(' '),
+            word_length_total=word_length_total,
+            has_space=has_space,
+            lead_token=lead_token,
+            trail_token=trail_token,
+            interior_words=sum(interior_terms.values()),
+            interior_terms=interior_terms,
+            sentences=_chunk_segments(
+                text,
+                sum(1 for _ in _SENTENCE_RE.finditer(text)),
+                first_delimiter.start() if first_delimiter else -1,
+                last_delimiter + 1
+            ),
+            lines=_chunk_segments(text, line_count, text.find('\n'), text.rfind('\n') + 1),
+            paragraphs=_chunk_segments(text, paragraph_count, text.find('\n\n'), last_break + 2),
+            lead_newlines=_edge_newlines(text, at_end=False),
+            trail_newlines=_edge_newlines(text, at_end=True),
+            all_newlines=_NEWLINES_RE.fullmatch(text) is not None
+        )
+    
+    def merge(self, other):
+        """Merge with the partial stats of the chunk that immediately follows this one"""
+        if not self.character_count:
+            return other
+        if not other.character_count:
+            return self
+        
+        joined = self.trail_token + other.lead_token
+        if self.has_space and other.has_space:
+            lead_token, trail_token = self.lead_token, other.trail_token
+            interior_terms = Counter(self.interior_terms)
+            if joined:
+                interior_terms[joined] += 1
+            interior_terms.update(other.interior_terms)
+        elif self.has_space:
+            lead_token, trail_token, interior_terms = self.lead_token, joined, Counter(self.interior_terms)
+        elif other.has_space:
+            lead_token, trail_token, interior_terms = joined, other.trail_token, Counter(other.interior_terms)
+        else:
+            lead_token, trail_token, interior_terms = joined, joined, Counter()
+        
+        # Newline runs meeting at the boundary can form a new paragraph break
+        paragraph_join = self.trail_newlines + other.lead_newlines < 2
+        
+        return PartialTextStats(
+            character_count=self.character_count + other.character_count,
+            space_count=self.space_count + other.space_count,
+            word_length_total=self.word_length_total + other.word_length_total,
+            has_space=self.has_space or other.has_space,
+            lead_token=lead_token,
+            trail_token=trail_token,
+            interior_words=sum(interior_terms.values()),
+            interior_terms=interior_terms,
+            sentences=_merge_segments(self.sentences, other.sentences),
+            lines=_merge_segments(self.lines, other.lines),
+            paragraphs=_merge_segments(self.paragraphs, other.paragraphs, join=paragraph_join),
+            lead_newlines=min(2, self.lead_newlines + other.lead_newlines) if self.all_newlines else self.lead_newlines,
+            trail_newlines=min(2, self.trail_newlines + other.trail_newlines) if other.all_newlines else other.trail_newlines,
+            all_newlines=self.all_newlines and other.all_newlines
+        )
+    
+    def finalize(self):
+        """Close the open edges and return the stats of the whole merged text"""
+        term_counts = Counter()
+        if self.lead_token:
+            term_counts[self.lead_token] += 1
+        term_counts.update(self.interior_terms)
+        if self.trail_token and self.has_space:
+            term_counts[self.trail_token] += 1
+        
+        return TextStats(
+            word_count=sum(term_counts.values()),
+            sentence_count=self.sentences.count,
+            paragraph_count=self.paragraphs.count,
+            line_count=self.lines.count,
+            character_count=self.character_count,
+            character_count_no_spaces=self.character_count - self.space_count,
+            word_length_total=self.word_length_total,
+            term_counts=term_counts
+        )
+
+def compute_partial_stats(text):
+    """Compute mergeable partial stats for one chunk (safe to run in a process pool)"""
+    return PartialTextStats.from_text(text)
+
+def merge_partial_stats(partials):
+    """Merge partial stats of consecutive chunks, in document order"""
+    merged = PartialTextStats()
+    for partial in partials:
+        merged = merged.merge(partial)
+    return merged
+
+def compute_text_stats(text):
+    """Compute words, sentences, paragraphs, lines, characters and term frequencies together
+    
+    Each underlying primitive (whitespace split, sentence scan, line scan) runs
+    once over the text and every metric is derived from those results.
+    """
+    return PartialTextStats.from_text(text).finalize()
+
+def compute_chunked_text_stats(chunks, max_workers=None):
+    """Compute stats for a document given as consecutive chunks, optionally on a process pool
+    
+    chunks can be any iterable of strings, such as a streaming extractor's output.
+    """
+    if max_workers and max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            return merge_partial_stats(pool.map(compute_partial_stats, chunks)).finalize()
+    return merge_partial_stats(map(compute_partial_stats, chunks)).finalize()
+
+def top_words_from_stats(stats, top_n=10):
+    """Get most common words from precomputed term counts"""
+    counts = Counter()
+    for term, count in stats.term_counts.items():
+        for word in _WORD_RE.findall(term.lower()):
+            if word not in STOP_WORDS and len(word) > 2:
+                counts[word] += count
+    return counts.most_common(top_n)
+
+def _readability_from_stats(stats):
+    """Readability bucket from word and sentence counts"""
+    if stats.sentence_count == 0:
+        return "N/A"
+    
+    avg_words_per_sentence = stats.word_count / stats.sentence_count
+    
+    if avg_words_per_sentence < 15:
+        return "Easy"
+    elif avg_words_per_sentence < 20:
+        return "Medium"
+    else:
+        return "Hard"
+
+def complexity_from_stats(stats):
+    """Text complexity metrics from precomputed stats"""
+    words = stats.word_count
+    sentences = stats.sentence_count
+    characters = stats.character_count_no_spaces
+    
+    return {
+        'avg_word_length': round(characters / words, 1) if words > 0 else 0,
+        'avg_sentence_length': round(words / sentences, 1) if sentences > 0 else 0,
+        'readability': _readability_from_stats(stats)
+    }
 
 def count_words(text):
     """Count total words in text"""
@@ -53,15 +325,9 @@ def get_most_common_words(text, top_n=10):
     if not text:
         return []
     
-    # Simple stop words
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                  'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 
-                  'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
-                  'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'}
-    
     # Clean and split text
-    words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
-    filtered_words = [word for word in words if word not in stop_words and len(word) > 2]
+    words = _WORD_RE.findall(text.lower())
+    filtered_words = [word for word in words if word not in STOP_WORDS and len(word) > 2]
     
     return Counter(filtered_words).most_common(top_n)
 
@@ -80,20 +346,29 @@ def calculate_text_complexity(text):
         'readability': analyze_readability(text)
     }
 
-def analyze_text_structure(text):
+def structure_from_stats(stats):
+    """Text structure analysis from precomputed stats"""
+    return {
+        'word_count': stats.word_count,
+        'sentence_count': stats.sentence_count,
+        'paragraph_count': stats.paragraph_count,
+        'line_count': stats.line_count,
+        'character_count': stats.character_count,
+        'character_count_no_spaces': stats.character_count_no_spaces,
+        'complexity': complexity_from_stats(stats),
+        'top_words': top_words_from_stats(stats, 5)
+    }
+
+def analyze_text_chunks(chunks, max_workers=None):
+    """Text structure analysis over consecutive chunks, identical to analyzing the joined text"""
+    stats = compute_chunked_text_stats(chunks, max_workers)
+    if not stats.character_count:
+        return {}
+    return structure_from_stats(stats)
+
+def analyze_text_structure(text, stats=None):
     """Complete text structure analysis"""
     if not text:
         return {}
     
-    analysis = {
-        'word_count': count_words(text),
-        'sentence_count': count_sentences(text),
-        'paragraph_count': count_paragraphs(text),
-        'line_count': count_lines(text),
-        'character_count': len(text),
-        'character_count_no_spaces': len(text.replace(' ', '')),
-        'complexity': calculate_text_complexity(text),
-        'top_words': get_most_common_words(text, 5)
-    }
-    
-    return analysis
\ No newline at end of file
+    return structure_from_stats(stats or compute_text_stats(text))
\ No newline at end of file
@@ -1,74 +1,452 @@
+import codecs
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 import PyPDF2
-import pytesseract
-from PIL import Image
-from docx import Document
+import openpyxl
+import pypdfium2 as pdfium
 import pandas as pd
 from io import BytesIO
+from config import Config
+from cache_store import CompressedCache
+from document_buffer import DocumentBuffer
+from docx_stream import extract_docx_text, iter_docx_sections
+from ocr_engine import ocr_image, recognize_image, tesseract_available
 
-def extract_from_pdf(file):
-    """Extract text from PDF file"""
+@contextmanager
+def _file_on_disk(file, suffix=""):
+    """Yield a filesystem path for file, spooling in-memory uploads to a temp file"""
+    if isinstance(file, (str, os.PathLike)):
+        yield os.fspath(file)
+        return
+    
+    try:
+        file.fileno()
+        yield file.name
+        return
+    except Exception:
+        pass
+    
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    try:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        shutil.copyfileobj(file, temp_file, Config.IO_CHUNK_BYTES)
+        temp_file.close()
+        yield temp_file.name
+    finally:
+        temp_file.close()
+        os.unlink(temp_file.name)
+
+def _extract_pdf_page_range(path, start, stop):
+    """Extract text of pages [start, stop) from a PDF on disk (process pool worker)"""
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+def _iter_pdf_pages_parallel(file, page_count, max_workers=None):
+    """Yield (page_number, text) in order, extracting page-range shards in a process pool"""
+    workers = max_workers or Config.EXTRACTION_MAX_WORKERS
+    shard_pages = Config.PDF_SHARD_PAGES
+    shards = iter([(start, min(start + shard_pages, page_count))
+                   for start in range(0, page_count, shard_pages)])
+    
+    with _file_on_disk(file, suffix=".pdf") as path:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            # Keep a bounded window of shards in flight so memory stays at a few shards
+            pending = deque()
+            for start, stop in shards:
+                pending.append((start, pool.submit(_extract_pdf_page_range, path, start, stop)))
+                if len(pending) >= workers * 2:
+                    break
+            
+            while pending:
+                start, future = pending.popleft()
+                texts = future.result()
+                next_shard = next(shards, None)
+                if next_shard:
+                    pending.append((next_shard[0], pool.submit(_extract_pdf_page_range, path, *next_shard)))
+                
+                for offset, text in enumerate(texts):
+                    yield start + offset + 1, text
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+def iter_pdf_pages(file, parallel=None, max_workers=None):
+    """Yield (page_number, text) for each PDF page in page order
+    
+    Large documents (Config.PDF_PARALLEL_MIN_PAGES or more) are split into page-range
+    shards and extracted on a process pool unless parallel is set explicitly. With a
+    single worker there is nothing to gain from a pool, so pages are read in-process.
+    """
+    reader = PyPDF2.PdfReader(file)
+    page_count = len(reader.pages)
+    
+    if parallel is None:
+        parallel = page_count >= Config.PDF_PARALLEL_MIN_PAGES
+    
+    if not parallel or page_count <= 1 or (max_workers or Config.EXTRACTION_MAX_WORKERS) <= 1:
+        for index, page in enumerate(reader.pages):
+            yield index + 1, page.extract_text() or ""
+        return
+    
+    del reader
+    yield from _iter_pdf_pages_parallel(file, page_count, max_workers)
+
+def _has_text_layer(text):
+    """Check if a page's text layer has enough characters to skip OCR"""
+    return len("".join(text.split())) >= Config.PDF_OCR_MIN_CHARS
+
+def _ocr_pdf_page(path, page_index, dpi):
+    """Rasterize a single PDF page and OCR it (process pool worker)
+    
+    Returns (text, None) or (None, error message). Errors are returned as
+    strings because some OCR exceptions cannot be unpickled in the parent,
+    which would break the whole pool.
+    """
     try:
-        reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        pdf = pdfium.PdfDocument(path)
+        try:
+            page = pdf[page_index]
+            image = page.render(scale=dpi / 72).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+        return recognize_image(image, target_dpi=dpi), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def _failed_ocr(error):
+    """An already finished OCR result carrying an error"""
+    future = Future()
+    future.set_result((None, error))
+    return future
+
+def iter_pdf_pages_hybrid(file, parallel=None, max_workers=None, ocr_failures=None):
+    """Yield (page_number, text) in page order, OCRing only pages without a text layer
+    
+    Born-digital pages come straight from the text layer. Image-only pages are
+    rasterized and OCRed on a process pool and merged back in page order. A page
+    whose OCR fails keeps its text layer and is appended to ocr_failures as
+    (page_number, error), so callers can tell degraded text from a clean result.
+    
+    A crashed OCR worker only costs the page being resolved: the pool is
+    replaced and the other pages in flight are resubmitted, up to
+    Config.OCR_MAX_POOL_RESTARTS times per document.
+    """
+    with _file_on_disk(file, suffix=".pdf") as path:
+        pool = None
+        restarts = 0
+        pending = deque()
+        window = Config.OCR_MAX_WORKERS * 2
+        ocr_error = None if tesseract_available() else "tesseract is not installed"
+        
+        def submit(page_number):
+            nonlocal pool
+            if ocr_error:
+                return _failed_ocr(ocr_error)
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=Config.OCR_MAX_WORKERS)
+            try:
+                return pool.submit(_ocr_pdf_page, path, page_number - 1, Config.OCR_DPI)
+            except BrokenProcessPool:
+                replace_pool()
+                return submit(page_number)
+        
+        def replace_pool():
+            nonlocal pool, restarts, ocr_error
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+            restarts += 1
+            if restarts > Config.OCR_MAX_POOL_RESTARTS:
+                ocr_error = "OCR workers kept crashing"
+            # Every unfinished page was on the broken pool
+            for index in range(len(pending)):
+                page_number, text, future = pending[index]
+                if future is not None and (not future.done() or future.cancelled() or future.exception() is not None):
+                    pending[index] = (page_number, text, submit(page_number))
+        
+        def resolve(page_number, text, future):
+            if future is None:
+                return page_number, text
+            try:
+                ocr_text, error = future.result()
+            except BrokenProcessPool as e:
+                ocr_text, error = None, f"OCR worker crashed: {e}"
+                replace_pool()
+            if error is None:
+                return page_number, ocr_text
+            
+            # Keep whatever the text layer had if OCR fails for this page
+            print(f"Error running OCR on PDF page {page_number}: {error}")
+            if ocr_failures is not None:
+                ocr_failures.append((page_number, error))
+            return page_number, text
+        
+        try:
+            for page_number, text in iter_pdf_pages(path, parallel=parallel, max_workers=max_workers):
+                future = None if _has_text_layer(text) else submit(page_number)
+                pending.append((page_number, text, future))
+                
+                while pending and (pending[0][2] is None or pending[0][2].done() or len(pending) > window):
+                    yield resolve(*pending.popleft())
+            
+            while pending:
+                yield resolve(*pending.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+def _ocr_failure_error(ocr_failures):
+    """Extraction error for a PDF whose pages all came out empty because OCR failed"""
+    return f"Error extracting PDF: OCR failed on {len(ocr_failures)} page(s): {ocr_failures[0][1]}"
+
+def extract_from_pdf(file, parallel=None, ocr_fallback=None, ocr_failures=None):
+    """Extract text from PDF file
+    
+    Pages whose OCR failed are appended to ocr_failures; if no text is left
+    at all, the failure is returned as an extraction error.
+    """
+    if ocr_fallback is None:
+        ocr_fallback = Config.PDF_OCR_FALLBACK
+    ocr_failures = [] if ocr_failures is None else ocr_failures
+    
+    try:
+        if ocr_fallback:
+            pages = iter_pdf_pages_hybrid(file, parallel=parallel, ocr_failures=ocr_failures)
+        else:
+            pages = iter_pdf_pages(file, parallel=parallel)
+        text = "\n".join(text for _, text in pages).strip()
     except Exception as e:
         return f"Error extracting PDF: {str(e)}"
+    
+    if ocr_failures and not text:
+        return _ocr_failure_error(ocr_failures)
+    return text
 
 def extract_from_docx(file):
-    """Extract text from DOCX file"""
+    """Extract text from DOCX file, including tables, headers and footers"""
     try:
-        doc = Document(file)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
+        return extract_docx_text(file)
     except Exception as e:
         return f"Error extracting DOCX: {str(e)}"
 
+def _iter_byte_blocks(file, chunk_size):
+    """Yield raw blocks of file, memory-mapping real files and slicing in-memory buffers"""
+    try:
+        fileno = file.fileno()
+    except Exception:
+        fileno = None
+    
+    if fileno is not None and os.fstat(fileno).st_size > 0:
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), chunk_size):
+                yield mapped[start:start + chunk_size]
+        return
+    
+    if hasattr(file, 'getbuffer'):
+        view = file.getbuffer()
+        try:
+            for start in range(file.tell(), len(view), chunk_size):
+                yield view[start:start + chunk_size]
+        finally:
+            view.release()
+        return
+    
+    while True:
+        block = file.read(chunk_size)
+        if not block:
+            break
+        yield block
+
+def _sniff_encoding(block):
+    """Guess the encoding of a file from its first block"""
+    head = bytes(block[:4])
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(block, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return Config.TEXT_FALLBACK_ENCODING
+
+def iter_text_chunks(file, chunk_size=None, encoding=None):
+    """Yield decoded text chunks of roughly chunk_size bytes
+    
+    The encoding is sniffed from the first block unless given. Undecodable
+    bytes are replaced instead of aborting the extraction.
+    """
+    chunk_size = chunk_size or Config.TEXT_CHUNK_BYTES
+    decoder = None
+    
+    for block in _iter_byte_blocks(file, chunk_size):
+        if isinstance(block, str):
+            yield block
+            continue
+        
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(encoding or _sniff_encoding(block))(errors='replace')
+        text = decoder.decode(block)
+        if text:
+            yield text
+    
+    if decoder is not None:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
 def extract_from_txt(file):
     """Extract text from TXT file"""
     try:
-        content = file.read()
-        if isinstance(content, bytes):
-            content = content.decode('utf-8')
-        return content.strip()
+        return "".join(iter_text_chunks(file)).strip()
     except Exception as e:
         return f"Error extracting TXT: {str(e)}"
 
-def extract_from_excel(file):
+def _format_cell(value):
+    """Render a cell value compactly on a single line"""
+    if value is None:
+        return ""
+    text = str(value)
+    if '\t' in text or '\n' in text or '\r' in text:
+        text = " ".join(text.split())
+    return text
+
+def _iter_xls_sheets(file):
+    """Yield (sheet_name, rows) for legacy .xls workbooks via pandas/xlrd"""
+    sheets = pd.read_excel(file, sheet_name=None, header=None)
+    for sheet_name, sheet_df in sheets.items():
+        yield sheet_name, ([None if pd.isna(value) else value for value in values]
+                           for values in sheet_df.itertuples(index=False, name=None))
+
+def _iter_xlsx_sheets(file):
+    """Yield (sheet_name, rows) streaming rows from a read-only openpyxl workbook"""
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            yield worksheet.title, worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def iter_excel_rows(file, max_rows=None, max_cells=None):
+    """Yield (sheet_name, row_text) with tab-separated cells, one row at a time
+    
+    max_rows and max_cells cap what is emitted per sheet; once a sheet hits a
+    cap its remaining rows are not read at all, which keeps metadata-only runs
+    cheap on very large workbooks.
+    """
+    max_rows = max_rows or Config.EXCEL_MAX_ROWS_PER_SHEET
+    max_cells = max_cells or Config.EXCEL_MAX_CELLS_PER_SHEET
+    
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    is_xlsx = zipfile.is_zipfile(file)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    sheets = _iter_xlsx_sheets(file) if is_xlsx else _iter_xls_sheets(file)
+    
+    for sheet_name, rows in sheets:
+        row_count, cell_count = 0, 0
+        for values in rows:
+            if (max_rows and row_count >= max_rows) or (max_cells and cell_count >= max_cells):
+                break
+            
+            cells = [_format_cell(value) for value in values]
+            while cells and not cells[-1]:
+                cells.pop()
+            if not cells:
+                continue
+            
+            if max_cells and cell_count + len(cells) > max_cells:
+                cells = cells[:max_cells - cell_count]
+            row_count += 1
+            cell_count += len(cells)
+            yield sheet_name, "\t".join(cells)
+
+def iter_excel_sheets(file, max_rows=None, max_cells=None):
+    """Yield (sheet_name, text) per sheet as compact tab-separated text"""
+    current_sheet, lines = None, []
+    for sheet_name, row_text in iter_excel_rows(file, max_rows, max_cells):
+        if sheet_name != current_sheet:
+            if lines:
+                yield current_sheet, "\n".join(lines)
+            current_sheet, lines = sheet_name, []
+        lines.append(row_text)
+    if lines:
+        yield current_sheet, "\n".join(lines)
+
+def extract_from_excel(file, max_rows=None, max_cells=None):
     """Extract text from Excel file"""
     try:
-        df = pd.read_excel(file, sheet_name=None)
-        text = ""
-        for sheet_name, sheet_df in df.items():
-            text += f"Sheet: {sheet_name}\n"
-            text += sheet_df.to_string(index=False) + "\n\n"
-        return text.strip()
+        return "\n\n".join(f"Sheet: {sheet_name}\n{text}"
+                           for sheet_name, text in iter_excel_sheets(file, max_rows, max_cells)).strip()
     except Exception as e:
         return f"Error extracting Excel: {str(e)}"
 
 def extract_from_image_ocr(file):
     """Extract text from image using OCR"""
     try:
-        image = Image.open(file)
-        text = pytesseract.image_to_string(image)
-        return text.strip()
+        return ocr_image(file)['text'].strip()
     except Exception as e:
         return f"Error extracting OCR: {str(e)}"
 
 def extract_from_markdown(file):
     """Extract text from Markdown file"""
     try:
-        content = file.read()
-        if isinstance(content, bytes):
-            content = content.decode('utf-8')
-        return content.strip()
+        return "".join(iter_text_chunks(file)).strip()
     except Exception as e:
         return f"Error extracting Markdown: {str(e)}"
 
-def extract_text(file, file_type):
+# Bump an extractor's version whenever its output changes so stale cache entries are skipped
+EXTRACTOR_VERSIONS = {
+    'pdf': 3,
+    'docx': 2,
+    'txt': 2,
+    'excel': 2,
+    'image_ocr': 2,
+    'markdown': 2
+}
+
+_extraction_cache = None
+
+def get_extraction_cache():
+    """Get the process-wide extraction cache"""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = CompressedCache(
+            Config.EXTRACTION_CACHE_PATH,
+            max_bytes=Config.EXTRACTION_CACHE_MAX_MB * 1024 * 1024
+        )
+    return _extraction_cache
+
+def file_sha256(file):
+    """Compute the SHA-256 of a file's bytes without changing its position"""
+    position = file.tell() if hasattr(file, 'tell') else 0
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    
+    digest = hashlib.sha256()
+    for block in _iter_byte_blocks(file, Config.IO_CHUNK_BYTES):
+        digest.update(block.encode('utf-8') if isinstance(block, str) else block)
+    
+    if hasattr(file, 'seek'):
+        file.seek(position)
+    return digest.hexdigest()
+
+def extraction_cache_key(file, file_type):
+    """Build the cache key from file content, extractor name and extractor version"""
+    return f"{file_sha256(file)}:{file_type}:v{EXTRACTOR_VERSIONS[file_type]}"
+
+def extract_text(file, file_type, use_cache=None):
     """Main text extraction function"""
     extractors = {
         'pdf': extract_from_pdf,
@@ -83,8 +461,74 @@ def extract_text(file, file_type):
     if not extractor:
         return f"Unsupported file type: {file_type}"
     
+    if use_cache is None:
+        use_cache = Config.EXTRACTION_CACHE_ENABLED
+    
+    cache_key = None
+    if use_cache:
+        cache_key = extraction_cache_key(file, file_type)
+        cached = get_extraction_cache().get(cache_key)
+        if cached is not None:
+            return cached
+    
     # Reset file pointer
     if hasattr(file, 'seek'):
         file.seek(0)
     
-    return extractor(file)
\ No newline at end of file
+    ocr_failures = []
+    text = extract_from_pdf(file, ocr_failures=ocr_failures) if file_type == 'pdf' else extractor(file)
+    
+    # Only successful extractions are worth caching; text missing OCRed pages may succeed on a retry
+    if cache_key and not ocr_failures and not text.startswith("Error extracting"):
+        get_extraction_cache().put(cache_key, text)
+    
+    return text
+
+def extract_document(file, file_type, use_cache=None):
+    """Extract a document into a DocumentBuffer that keeps page, sheet and DOCX part boundaries"""
+    if file_type not in ('pdf', 'excel', 'docx'):
+        return DocumentBuffer(extract_text(file, file_type, use_cache=use_cache))
+    
+    if use_cache is None:
+        use_cache = Config.EXTRACTION_CACHE_ENABLED
+    
+    cache_key = None
+    if use_cache:
+        cache_key = f"{extraction_cache_key(file, file_type)}:document"
+        cached = get_extraction_cache().get(cache_key)
+        if cached is not None:
+            return DocumentBuffer.from_json(cached)
+    
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    
+    ocr_failures = []
+    try:
+        if file_type == 'pdf':
+            if Config.PDF_OCR_FALLBACK:
+                pages = iter_pdf_pages_hybrid(file, ocr_failures=ocr_failures)
+            else:
+                pages = iter_pdf_pages(file)
+            document = DocumentBuffer.from_pages((f"Page {number}", text) for number, text in pages)
+        elif file_type == 'docx':
+            document = DocumentBuffer.from_pages(iter_docx_sections(file), separator="\n\n")
+        else:
+            document = DocumentBuffer.from_pages(
+                ((sheet_name, f"Sheet: {sheet_name}\n{text}") for sheet_name, text in iter_excel_sheets(file)),
+                separator="\n\n"
+            )
+    except Exception as e:
+        label = {'pdf': 'PDF', 'docx': 'DOCX'}.get(file_type, 'Excel')
+        return DocumentBuffer(f"Error extracting {label}: {str(e)}")
+    
+    if ocr_failures:
+        if not document.text.strip():
+            return DocumentBuffer(_ocr_failure_error(ocr_failures))
+        # Degraded text is returned but not cached, so a later run can OCR the missing pages
+        document.ocr_failures = ocr_failures
+        return document
+    
+    if cache_key:
+        get_extraction_cache().put(cache_key, document.to_json())
+    
+    return document
\ No newline at end of file
@@ -1,3 +1,5 @@
+import csv
+import io
 import re
 import json
 from datetime import datetime
@@ -72,13 +74,31 @@ def safe_divide(numerator, denominator):
         return 0
     return numerator / denominator
 
-def export_metadata_json(metadata):
+def export_metadata_json(metadata, indent=2):
     """Export metadata as JSON string"""
     try:
-        return json.dumps(metadata, indent=2, ensure_ascii=False)
+        return json.dumps(metadata, indent=indent, ensure_ascii=False)
     except Exception as e:
         return f"Error exporting JSON: {str(e)}"
 
+def export_metadata_jsonl(records):
+    """Export many metadata records as JSON Lines, one compact record per line"""
+    return "".join(export_metadata_json(record, indent=None) + "\n" for record in records)
+
+def export_metadata_csv(records):
+    """Export many metadata records as CSV, joining list values with semicolons"""
+    columns = []
+    for record in records:
+        columns.extend(key for key in record if key not in columns)
+    
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=columns)
+    writer.writeheader()
+    for record in records:
+        writer.writerow({key: "; ".join(map(str, value)) if isinstance(value, list) else value
+                         for key, value in record.items()})
+    return output.getvalue()
+
 def get_file_extension(filename):
     """Get file extension from filename"""
     return Path(filename).suffix.lower()
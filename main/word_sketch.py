@@ -0,0 +1,169 @@
+import heapq
+import re
+from config import Config
+from text_analyzer import STOP_WORDS
+from language_detector import detect_language
+from near_duplicate_index import _CJK
+
+# Letters only, so digits and underscores never become "words"; keeps inner apostrophes.
+# Han and kana are written without spaces, so their runs are matched separately and split into bigrams
+_UNICODE_WORD_RE = re.compile(rf"([{_CJK}]+)|[^\W\d_{_CJK}]+(?:['’][^\W\d_{_CJK}]+)*")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+STOP_WORDS_BY_LANGUAGE = {
+    'English': STOP_WORDS,
+    'Spanish': {'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'y', 'o', 'pero', 'de', 'del',
+                'en', 'con', 'por', 'para', 'que', 'es', 'son', 'fue', 'ser', 'se', 'su', 'sus', 'al',
+                'lo', 'como', 'más', 'este', 'esta', 'estos', 'estas', 'yo', 'tú', 'él', 'ella', 'nosotros'},
+    'French': {'le', 'la', 'les', 'un', 'une', 'des', 'et', 'ou', 'mais', 'de', 'du', 'en', 'dans',
+               'avec', 'par', 'pour', 'sur', 'que', 'qui', 'est', 'sont', 'été', 'être', 'au', 'aux',
+               'ce', 'cette', 'ces', 'il', 'elle', 'nous', 'vous', 'ils', 'elles', 'pas', 'plus', 'son', 'sa'},
+    'German': {'der', 'die', 'das', 'den', 'dem', 'des', 'ein', 'eine', 'einer', 'eines', 'und', 'oder',
+               'aber', 'in', 'im', 'auf', 'mit', 'von', 'zu', 'zum', 'zur', 'für', 'ist', 'sind', 'war',
+               'wird', 'werden', 'nicht', 'sich', 'es', 'er', 'sie', 'wir', 'ihr', 'ich', 'auch', 'als', 'dass'},
+    'Italian': {'il', 'lo', 'la', 'i', 'gli', 'le', 'un', 'una', 'e', 'o', 'ma', 'di', 'del', 'della',
+                'in', 'con', 'per', 'su', 'che', 'è', 'sono', 'era', 'essere', 'si', 'non', 'come', 'questo',
+                'questa', 'io', 'tu', 'lui', 'lei', 'noi', 'voi', 'loro', 'al', 'alla', 'dei', 'delle'},
+    'Portuguese': {'o', 'a', 'os', 'as', 'um', 'uma', 'e', 'ou', 'mas', 'de', 'do', 'da', 'dos', 'das',
+                   'em', 'no', 'na', 'com', 'por', 'para', 'que', 'é', 'são', 'foi', 'ser', 'se', 'não',
+                   'como', 'mais', 'este', 'esta', 'eu', 'tu', 'ele', 'ela', 'nós', 'eles', 'elas'},
+    'Dutch': {'de', 'het', 'een', 'en', 'of', 'maar', 'in', 'op', 'met', 'van', 'voor', 'naar', 'aan',
+              'is', 'zijn', 'was', 'waren', 'wordt', 'worden', 'niet', 'dat', 'die', 'dit', 'deze', 'ik',
+              'jij', 'hij', 'zij', 'wij', 'jullie', 'ook', 'als', 'er', 'te', 'om', 'bij'}
+}
+
+class SpaceSavingSketch:
+    """Space-Saving heavy-hitter sketch with a fixed number of counters
+    
+    Each reported count overestimates the true count by at most its error,
+    and every error is bounded by total / capacity.
+    """
+    
+    def __init__(self, capacity=None):
+        self.capacity = capacity or Config.TOP_WORDS_SKETCH_CAPACITY
+        self.total = 0
+        self._counts = {}
+        self._errors = {}
+        self._heap = []
+    
+    def _pop_min(self):
+        """Pop the item with the smallest counter, refreshing stale heap entries"""
+        while True:
+            count, item = heapq.heappop(self._heap)
+            current = self._counts[item]
+            if current == count:
+                return count, item
+            heapq.heappush(self._heap, (current, item))
+    
+    def add(self, item, count=1):
+        """Count item, replacing the smallest counter when the sketch is full"""
+        self.total += count
+        if item in self._counts:
+            # The heap entry goes stale here and is refreshed lazily in _pop_min
+            self._counts[item] += count
+            return
+        
+        error = 0
+        if len(self._counts) >= self.capacity:
+            error, victim = self._pop_min()
+            del self._counts[victim]
+            del self._errors[victim]
+        
+        self._counts[item] = error + count
+        self._errors[item] = error
+        heapq.heappush(self._heap, (error + count, item))
+    
+    def update(self, items):
+        """Count every item of an iterable"""
+        for item in items:
+            self.add(item)
+    
+    @property
+    def error_bound(self):
+        """Largest possible overestimate of any reported count"""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+    
+    def merge(self, other):
+        """Combine two sketches into a new one with the same capacity"""
+        capacity = max(self.capacity, other.capacity)
+        self_floor, other_floor = self.error_bound, other.error_bound
+        
+        combined = {}
+        for item in set(self._counts) | set(other._counts):
+            count = self._counts.get(item, self_floor) + other._counts.get(item, other_floor)
+            error = self._errors.get(item, self_floor) + other._errors.get(item, other_floor)
+            combined[item] = (count, error)
+        
+        merged = SpaceSavingSketch(capacity)
+        merged.total = self.total + other.total
+        for item, (count, error) in heapq.nlargest(capacity, combined.items(), key=lambda entry: entry[1][0]):
+            merged._counts[item] = count
+            merged._errors[item] = error
+        merged._heap = [(count, item) for item, count in merged._counts.items()]
+        heapq.heapify(merged._heap)
+        return merged
+    
+    def top(self, n=10):
+        """Return the n heaviest items as (item, count, error)"""
+        items = heapq.nlargest(n, self._counts.items(), key=lambda entry: entry[1])
+        return [(item, count, self._errors[item]) for item, count in items]
+
+def tokenize_words(text):
+    """Yield case-folded Unicode words from text without materializing a token list"""
+    for match in _UNICODE_WORD_RE.finditer(text):
+        run = match.group(1)
+        if run:
+            for start in range(max(1, len(run) - 1)):
+                yield run[start:start + 2]
+        else:
+            yield match.group().casefold()
+
+def get_stop_words(language):
+    """Get stop words for a detected language name, falling back to English"""
+    return STOP_WORDS_BY_LANGUAGE.get(language, STOP_WORDS)
+
+def sketch_words(text, language=None, capacity=None, sketch=None):
+    """Feed the non stop-word words of text into a (new or existing) sketch"""
+    if sketch is None:
+        sketch = SpaceSavingSketch(capacity)
+    if not text:
+        return sketch
+    
+    stop_words = get_stop_words(language or detect_language(text))
+    # CJK bigrams are kept: the length filter is only meant for short alphabetic words
+    sketch.update(word for word in tokenize_words(text)
+                  if (len(word) > 2 or _CJK_RE.match(word)) and word not in stop_words)
+    return sketch
+
+def _sketch_result(sketch, top_n):
+    """Format a sketch's heavy hitters together with their error bounds"""
+    top = sketch.top(top_n)
+    return {
+        'top_words': [(word, count) for word, count, _ in top],
+        'errors': {word: error for word, _, error in top},
+        'error_bound': sketch.error_bound,
+        'total_words': sketch.total,
+        'capacity': sketch.capacity
+    }
+
+def approximate_top_words(text, top_n=10, language=None, capacity=None):
+    """Approximate most common words using a fixed memory budget"""
+    return _sketch_result(sketch_words(text, language, capacity), top_n)
+
+def approximate_top_words_batch(texts, top_n=10, languages=None, capacity=None):
+    """Approximate most common words per document and aggregated across a batch"""
+    documents = []
+    corpus = SpaceSavingSketch(capacity)
+    
+    for index, text in enumerate(texts):
+        language = languages[index] if languages else None
+        sketch = sketch_words(text, language, capacity)
+        documents.append(_sketch_result(sketch, top_n))
+        corpus = corpus.merge(sketch)
+    
+    return {
+        'documents': documents,
+        'corpus': _sketch_result(corpus, top_n)
+    }